@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from driver_ids import concat_coded
+
+# Per-customer daily roaming results kept between runs, so each run only downloads the days a customer is missing
+# and the N-day per-account view is assembled locally. One Parquet file per customer (named by a hash of its
+# client_id, so no credentials end up in file names) plus state.json listing the days already pulled for each.
+STORE_DIR = os.path.join(".cache", "account_history")
+STATE_FILE = "state.json"
+
+# Days older than this are dropped from the store
+RETENTION_DAYS = 400
+
+COLUMNS = ['Date', 'Adapter', 'Driver', 'Adapter-Driver', 'goodSum', 'criticalSum', 'warningSum', 'clientCount']
+KEY_COLUMNS = ['Adapter', 'Driver', 'Adapter-Driver']
+
+# How a window rolls up the daily rows: minutes add up across days, but the same clients show up day after day,
+# so a driver's client count is its highest daily count (what one request for the whole window comes closest to)
+WINDOW_AGGREGATION = {'goodSum': 'sum', 'criticalSum': 'sum', 'warningSum': 'sum', 'clientCount': 'max'}
+
+
+def customer_key(client_id):
+    return hashlib.sha1(str(client_id).encode()).hexdigest()[:16]
+
+
+# Local-time [start, end) of a day in epoch milliseconds, as the API's from/to parameters expect
+def day_bounds(day):
+    start = datetime.fromisoformat(day)
+    return int(start.timestamp() * 1000), int((start + timedelta(days=1)).timestamp() * 1000)
+
+
+# The `days` complete days ending yesterday (today is still in progress), oldest first
+def window_days(days, end=None):
+    end = end or date.today() - timedelta(days=1)
+    return [(end - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+
+
+class AccountStore:
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(os.path.join(path, STATE_FILE)) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.parquet")
+
+    def _read(self, key):
+        try:
+            return pd.read_parquet(self._file(key))
+        except (OSError, ValueError):
+            return None
+
+    # Days of the window this customer hasn't been pulled for yet
+    def missing_days(self, client_id, days, end=None):
+        pulled = set(self.state.get(customer_key(client_id), ()))
+        return [day for day in window_days(days, end) if day not in pulled]
+
+    # Store the days of one successful pull: {day: frame of that day's rows, or None when it had none}
+    def add_days(self, client_id, day_frames):
+        if not day_frames:
+            return
+        key = customer_key(client_id)
+        cutoff = (date.today() - timedelta(days=RETENTION_DAYS)).isoformat()
+
+        frames = []
+        existing = self._read(key)
+        if existing is not None:
+            frames.append(existing[(existing['Date'] >= cutoff) & ~existing['Date'].isin(list(day_frames))])
+        for day, day_df in day_frames.items():
+            if day_df is not None and not day_df.empty:
+                frames.append(day_df.assign(Date=day)[COLUMNS])
+
+        os.makedirs(self.path, exist_ok=True)
+        store_df = concat_coded(frames) if frames else pd.DataFrame(columns=COLUMNS)
+        tmp_path = f"{self._file(key)}.tmp"
+        store_df[COLUMNS].to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self._file(key))
+
+        with self.lock:
+            pulled = set(self.state.get(key, ())) | set(day_frames)
+            self.state[key] = sorted(day for day in pulled if day >= cutoff)
+
+    # The customer's window, one row per driver (see WINDOW_AGGREGATION), tagged with the account, in
+    # parse_roaming_data's shape; None when empty
+    def window(self, client_id, account_name, days, end=None):
+        store_df = self._read(customer_key(client_id))
+        if store_df is None:
+            return None
+        store_df = store_df[store_df['Date'].isin(window_days(days, end))]
+        if store_df.empty:
+            return None
+
+        # Per day first (a driver has a row per roaming type), then across the days
+        daily_df = store_df.groupby(['Date'] + KEY_COLUMNS, as_index=False, observed=True)[list(WINDOW_AGGREGATION)].sum()
+        store_df = daily_df.groupby(KEY_COLUMNS, as_index=False, observed=True).agg(WINDOW_AGGREGATION)
+        store_df.insert(0, 'Account Name', pd.Categorical.from_codes(np.zeros(len(store_df), dtype=np.int8), categories=[account_name]))
+        return store_df
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = os.path.join(self.path, f"{STATE_FILE}.tmp")
+        with self.lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, os.path.join(self.path, STATE_FILE))
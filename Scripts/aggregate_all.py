@@ -0,0 +1,67 @@
+import argparse
+import pandas as pd
+import aggregate_roaming_data as aggregate
+import calculate_manufacturers_and_samples as manufacturers
+import aggregate_critical_roaming_minutes as critical
+from history_store import history_sources
+from run_metrics import stage
+from driver_ids import DriverIds
+
+# One pass over History for everything derived from it: the per-driver aggregates (aggregated_roaming_data.csv),
+# total critical minutes (aggregated_critical_roaming_minutes.json), the manufacturer distribution (manufacturers.csv)
+# and total samples (total_samples.csv). Each History file is read once, with only the columns the aggregates need;
+# unchanged files come straight from the aggregation cache. The output files match the three separate scripts'.
+
+
+# Empty strings come back as NaN when a stage re-reads a CSV; match that so in-memory handoffs give identical results
+def as_read_back(df):
+    text_columns = [col for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])]
+    df = df.copy()
+    for col in text_columns:
+        df[col] = df[col].mask(df[col] == '')
+    return df
+
+
+# {"aggregated", "critical_minutes", "manufacturers", "total_samples"} from one History scan; None when there is no History
+def aggregate_all(folder_path=aggregate.folder_path, rebuild=False):
+    files = history_sources(folder_path)
+    if not files:
+        print("No History data was found in the specified folder.")
+        return None
+
+    ids = DriverIds()
+    entries = aggregate.load_file_states(files, rebuild=rebuild, ids=ids)
+    aggregated_df = aggregate.aggregate_partials([entry['partial'] for entry in entries], ids)
+
+    # merged_roaming_analysis_with_vintage.csv is these rows with a vintage column joined on, so the
+    # manufacturer shares and total samples are taken straight from the aggregates as they read back from CSV
+    read_back = as_read_back(aggregated_df)
+    return {
+        "aggregated": aggregated_df,
+        "critical_minutes": critical.critical_minutes_summary(sum(entry['critical_total'] for entry in entries)),
+        "manufacturers": manufacturers.manufacturer_shares(read_back),
+        "total_samples": manufacturers.total_samples(read_back),
+    }
+
+
+def write_all(results):
+    aggregate.write_aggregated(results["aggregated"])
+    critical.write_critical_minutes(results["critical_minutes"])
+
+    results["manufacturers"].to_csv(manufacturers.manufacturers_output_file, index=False)
+    print(f"✅ Manufacturers data saved to {manufacturers.manufacturers_output_file}")
+    results["total_samples"].to_csv(manufacturers.total_samples_output_file, index=False)
+    print(f"✅ Total samples data successfully saved to: {manufacturers.total_samples_output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the aggregates, critical minutes, manufacturers and total samples from one History scan.")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the aggregation cache and re-read every History file")
+    args = parser.parse_args()
+
+    with stage("aggregate all") as aggregate_stage:
+        aggregate_stage["sources"] = len(history_sources(aggregate.folder_path))
+        results = aggregate_all(aggregate.folder_path, rebuild=args.rebuild)
+        if results is not None:
+            aggregate_stage["rows_out"] = len(results["aggregated"])
+            write_all(results)
@@ -1,55 +1,151 @@
 import pandas as pd
 import os
-import glob
+import pickle
+import hashlib
+import argparse
+from history_store import history_sources, read_source
+from run_metrics import stage
+from driver_ids import DriverIds, ID_COLUMN, compact_ints
+from normalization import default_normalizer
 
 # Specify the folder containing the roaming_data files
 folder_path = "History"  # Change this to your target folder path
 output_path = "Output" #Save aggregated data file here
 
-# Define a list of unwanted values dynamically
-unwanted_values = ['N/A', 'nan', 'Wi-Fi - 16.0 (1657)', 'Fi - 16.0 (1657)', 'Wi-Fi  (0x14E4, 0x4387) - 16.0 (1657)','iwlwifi', 'ath10k_pci', 'rtw89_8852be', 'Intel Corporation Wi-Fi 5(802.11ac) Wireless-AC 9x6x [Thunder Peak] [8086:2526] (rev 29) - iwlwifi', 'Intel Corporation Wireless-AC 9260 [8086:2526] (rev 29) - iwlwifi'
-]
+# Partial sums of every History file already folded in, so each run only parses new or changed files.
+# Partials are keyed by driver ID (driver_ids.py) with compact integer sums; the strings are decoded once at the end.
+cache_file = os.path.join(".cache", "aggregate_state.pkl")
 
-def combine_and_aggregate_roaming_data(folder_path):
-    # Get all CSV files in the folder that start with "roaming_data"
-    files = glob.glob(os.path.join(folder_path, "roaming_data*.csv"))
+# Output file path
+output_file = os.path.join(output_path, "aggregated_roaming_data.csv")
 
-    if not files:
-        print("No files starting with 'roaming_data' were found in the specified folder.")
-        return
+# Junk rows (unwanted adapters/drivers, Adapter-Driver starting with a number) are dropped by the "history" rule set
+# in Scripts/normalization_rules.json
+normalizer = default_normalizer()
+
+key_columns = ['Adapter-Driver', 'Adapter', 'Driver']
+sum_columns = ['Good Sum', 'Critical Sum', 'Warning Sum', 'Client Count', 'Total Sum']
+
+# Bump when the per-file reduction below changes so old caches are discarded
+CACHE_VERSION = 4
+
+
+def _file_digest(file):
+    with open(file, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# Identifies the cleanup rules; a cache built with different rules is thrown away
+def _rules_signature():
+    return hashlib.sha1(repr((CACHE_VERSION, normalizer.signature)).encode()).hexdigest()
+
+
+# A cache whose partials use IDs from another driver ID table (e.g. the table was deleted) is thrown away too
+def _load_cache(cache_path, ids):
+    try:
+        with open(cache_path, 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return {}
+    if state.get('rules') != _rules_signature() or state.get('ids') != ids.generation:
+        return {}
+    return state.get('files', {})
+
+
+def _save_cache(cache_path, files_state, ids):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'rules': _rules_signature(), 'ids': ids.generation, 'files': files_state}, f)
+    os.replace(tmp_path, cache_path)
+
+
+# Read one History source (only the columns needed) and reduce it to sums per (Adapter-Driver, Adapter, Driver) after cleanup,
+# keyed by driver ID, plus the file's Critical Sum over every row (critical minutes count all History rows, before cleanup)
+def reduce_history_file(file, ids):
+    df = read_source(file, columns=key_columns + sum_columns)
+    critical_total = int(df['Critical Sum'].sum())
+
+    # Missing values become empty strings and junk rows are dropped; the rules run once per distinct value
+    df = normalizer.apply("history", df)
+
+    sums = df.groupby(key_columns, as_index=False, sort=False, observed=True)[sum_columns].sum()
+    partial = compact_ints(sums[sum_columns].copy(), sum_columns)
+    partial.insert(0, ID_COLUMN, ids.encode(sums))
+    return partial, critical_total
 
-    # Initialize an empty list to store DataFrames
-    dataframes = []
 
-    # Read each file and append the DataFrame to the list
+# Return each file's cache entry ('file', 'partial' sums and 'critical_total'), reusing cached ones for files whose
+# (name, size, mtime) or content is unchanged. New driver IDs are saved to the ID table before the cache refers to them.
+def load_file_states(files, cache_path=cache_file, rebuild=False, ids=None):
+    ids = DriverIds() if ids is None else ids
+    cached = {} if rebuild else _load_cache(cache_path, ids)
+    files_state = {}
+    reduced = 0
+
     for file in files:
+        stat = os.stat(file)
+        entry = cached.get(file)
+
+        if entry and entry['size'] == stat.st_size:
+            if entry['mtime'] == stat.st_mtime_ns:
+                files_state[file] = entry
+                continue
+
+            # A fresh checkout changes mtimes; an unchanged digest still lets us reuse the sums
+            digest = _file_digest(file)
+            if entry['sha1'] == digest:
+                files_state[file] = dict(entry, mtime=stat.st_mtime_ns)
+                continue
+
         try:
-            df = pd.read_csv(file)
-           
-            # Ensure 'Good Roaming Calculation (%)' is cleaned and converted to float
-            df['Good Roaming Calculation (%)'] = df['Good Roaming Calculation (%)'].str.replace('%', '').astype(float)
-            dataframes.append(df)
-            #print(f"Loaded: {file}")
+            partial, critical_total = reduce_history_file(file, ids)
         except Exception as e:
             print(f"Error reading {file}: {e}")
+            continue
 
-    # Combine all DataFrames
-    combined_df = pd.concat(dataframes, ignore_index=True)
+        files_state[file] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'sha1': _file_digest(file),
+            'partial': partial,
+            'critical_total': critical_total
+        }
+        reduced += 1
 
-    # Ensure 'Adapter-Driver' is treated as a string and fill NaN values with an empty string
-    combined_df['Adapter-Driver'] = combined_df['Adapter-Driver'].astype(str).fillna('')
-    combined_df['Adapter'] = combined_df['Adapter'].astype(str).fillna('')
-    combined_df['Driver'] = combined_df['Driver'].astype(str).fillna('')
+    # Files deleted from History simply drop out of the new state
+    ids.save()
+    _save_cache(cache_path, files_state, ids)
+    print(f"Folded {reduced} new or changed file(s) into {len(files_state) - reduced} cached one(s)")
 
+    return [dict(files_state[file], file=file) for file in files if file in files_state]
 
-    # Remove rows where Adapter-Driver column contains any of the unwanted values
-    combined_df = combined_df[~combined_df['Adapter-Driver'].isin(unwanted_values)]
 
-    # Remove rows where Driver contains any of the unwanted values
-    combined_df = combined_df[~combined_df['Driver'].isin(unwanted_values)]
+def load_partials(files, cache_path=cache_file, rebuild=False, ids=None):
+    return [entry['partial'] for entry in load_file_states(files, cache_path, rebuild, ids)]
+
+
+# Aggregate every History day into one row per Adapter-Driver; None when there is no History
+def aggregate_history(folder_path, rebuild=False):
+    # Get every History day: Parquet partitions, plus "roaming_data" CSVs not yet migrated
+    files = history_sources(folder_path)
+
+    if not files:
+        print("No History data was found in the specified folder.")
+        return None
 
-    # Remove rows where Adapter-Driver starts with a number
-    combined_df = combined_df[~combined_df['Adapter-Driver'].str.match(r'^\d')]
+    ids = DriverIds()
+    return aggregate_partials(load_partials(files, rebuild=rebuild, ids=ids), ids)
+
+
+# Fold per-file partial sums (keyed by driver ID) into one row per Adapter-Driver
+def aggregate_partials(partials, ids=None):
+    ids = DriverIds() if ids is None else ids
+
+    # Sum every file's rows per driver ID (integer keys, first-seen order), then decode only the distinct IDs
+    id_sums = pd.concat(partials, ignore_index=True).groupby(ID_COLUMN, sort=False)[sum_columns].sum()
+    combined_df = ids.decode(id_sums.index).astype(str)
+    combined_df[sum_columns] = id_sums.to_numpy()
 
     # Aggregate by 'Adapter-Driver' and sum the numeric columns
     aggregated_df = combined_df.groupby('Adapter-Driver', as_index=False).agg({
@@ -84,15 +180,30 @@ def combine_and_aggregate_roaming_data(folder_path):
     # Remove rows where 'Total Sum' is less than 10,000
     aggregated_df = aggregated_df[aggregated_df['Total Sum'] >= 10000]
 
-    
+    return aggregated_df.reset_index(drop=True)
 
-    # Output file path
-    output_file = os.path.join(output_path, "aggregated_roaming_data.csv")
 
+def write_aggregated(aggregated_df):
     # Save the aggregated data to a new CSV file
     aggregated_df.to_csv(output_file, index=False)
     print(f"✅ Daily data aggregated and successfully saved to: {output_file}")
     print()
 
-# Run the function
-combine_and_aggregate_roaming_data(folder_path)
+
+def combine_and_aggregate_roaming_data(folder_path, rebuild=False):
+    aggregated_df = aggregate_history(folder_path, rebuild=rebuild)
+    if aggregated_df is not None:
+        write_aggregated(aggregated_df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate all History files into Output/aggregated_roaming_data.csv.")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the aggregation cache and re-read every History file")
+    args = parser.parse_args()
+
+    with stage("aggregate") as aggregate_stage:
+        aggregate_stage["sources"] = len(history_sources(folder_path))
+        aggregated_df = aggregate_history(folder_path, rebuild=args.rebuild)
+        if aggregated_df is not None:
+            aggregate_stage["rows_out"] = len(aggregated_df)
+            write_aggregated(aggregated_df)
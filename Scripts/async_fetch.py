@@ -0,0 +1,169 @@
+import json
+import time
+import asyncio
+import aiohttp
+from tqdm import tqdm
+from token_cache import AUTH_HEADERS, get_cached_token, store_token, invalidate_token
+from run_metrics import record_customer, record_request, failure_reason
+from roaming_decode import PayloadError
+from fetch_scheduler import AdaptiveLimit, DEFAULT_MAX_CONCURRENCY, MAX_ATTEMPTS, RETRY_STATUSES, backoff_delay, retry_after_seconds
+
+# Keep idle connections to the API host open between customers
+KEEPALIVE_SECONDS = 30
+
+
+# session.request() under the adaptive limit, retrying transient failures (see fetch_scheduler.py); returns the
+# final (response, body), or raises the last connection error/timeout
+async def request_with_retry_async(session, limit, method, url, fetch_metrics=None, attempts=MAX_ATTEMPTS, **kwargs):
+    for attempt in range(attempts):
+        await limit.acquire_async()
+        start = time.perf_counter()
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            limit.release()
+            record_request(time.perf_counter() - start)
+            limit.record(congested=True)
+            if attempt == attempts - 1:
+                raise
+            retry_after = None
+        else:
+            latency = time.perf_counter() - start
+            limit.release()
+            record_request(latency)
+            if response.status not in RETRY_STATUSES:
+                limit.record(latency=latency)
+                return response, body
+            limit.record(congested=True)
+            if attempt == attempts - 1:
+                return response, body
+            retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+
+        if fetch_metrics is not None:
+            fetch_metrics["retries"] = fetch_metrics.get("retries", 0) + 1
+        await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+
+# Fetch an access token over the shared session, reusing a cached one while it is valid
+async def get_auth_token_async(session, limit, auth_url, client_id, client_secret, fetch_metrics=None):
+    token = get_cached_token(client_id)
+    if token:
+        return token
+
+    auth_data = {
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "grant_type": "client_credentials"
+    }
+    try:
+        response, body = await request_with_retry_async(session, limit, "POST", auth_url, fetch_metrics,
+                                                        data=auth_data, headers=AUTH_HEADERS)
+        response.raise_for_status()
+        payload = json.loads(body)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return None
+
+    token = payload.get("access_token")
+    if token:
+        store_token(client_id, token, payload.get("expires_in"))
+    return token
+
+
+# Download the raw response body; returns None when the token was rejected
+async def get_roaming_data_async(session, limit, data_url, token, fetch_metrics=None):
+    headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
+    response, body = await request_with_retry_async(session, limit, "GET", data_url, fetch_metrics, headers=headers)
+    if response.status == 401:
+        return None
+    response.raise_for_status()
+    return body
+
+
+# Authenticate once and download one customer's KPIs from each URL, handing every response body to parse()
+async def fetch_customer_data_async(session, limit, auth_url, data_urls, client_info, parse):
+    client_id, client_secret = client_info[0], client_info[1]
+    customer = client_info[2] if len(client_info) > 2 else client_id
+    fetch_metrics = {"auth_seconds": None, "fetch_seconds": None, "payload_bytes": None, "rows": None, "retries": 0, "error": None}
+    results = []
+
+    try:
+        start = time.perf_counter()
+        token = await get_auth_token_async(session, limit, auth_url, client_id, client_secret, fetch_metrics)
+        fetch_metrics["auth_seconds"] = round(time.perf_counter() - start, 3)
+
+        if not token:
+            fetch_metrics["error"] = "authentication failed"
+            return None
+
+        try:
+            start = time.perf_counter()
+            for data_url in data_urls:
+                roaming_data = await get_roaming_data_async(session, limit, data_url, token, fetch_metrics)
+
+                # A cached token can be revoked before it expires; get a fresh one and retry once
+                if roaming_data is None:
+                    invalidate_token(client_id)
+                    token = await get_auth_token_async(session, limit, auth_url, client_id, client_secret, fetch_metrics)
+                    if not token:
+                        fetch_metrics["error"] = "authentication failed after 401"
+                        return None
+                    roaming_data = await get_roaming_data_async(session, limit, data_url, token, fetch_metrics)
+
+                results.append(roaming_data)
+            fetch_metrics["fetch_seconds"] = round(time.perf_counter() - start, 3)
+            fetch_metrics["payload_bytes"] = sum(len(body) for body in results if body)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            fetch_metrics["error"] = failure_reason(e)
+            return None
+
+        # An undecodable body loses this customer only
+        try:
+            parsed = [parse(roaming_data, *client_info[2:]) if roaming_data else None for roaming_data in results]
+        except PayloadError as e:
+            fetch_metrics["error"] = failure_reason(e)
+            return None
+        fetch_metrics["rows"] = sum(len(df) for df in parsed if df is not None)
+        return parsed
+    finally:
+        record_customer(customer, **fetch_metrics)
+
+
+async def _fetch_all(auth_url, data_urls, clients, parse, concurrency, timeout):
+    # One pooled, keep-alive connector shared by every customer request; requests in flight adapt below `concurrency`
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=KEEPALIVE_SECONDS, ttl_dns_cache=300)
+    limit = AdaptiveLimit(maximum=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        tasks = [
+            asyncio.ensure_future(fetch_customer_data_async(session, limit, auth_url,
+                                                            data_urls(client_info) if callable(data_urls) else data_urls,
+                                                            client_info, parse))
+            for client_info in clients
+        ]
+
+        with tqdm(total=len(tasks), desc="Fetching Data") as progress:
+            for task in asyncio.as_completed(tasks):
+                await task
+                progress.update(1)
+
+        # Results come back in the same order as clients
+        return [task.result() for task in tasks]
+
+
+# Fetch all customers concurrently; returns one parse() result (or None) per client, in order.
+# Pass a list of URLs to pull several windows per customer with one token; each result is then a list.
+# Pass a function of client_info instead to give each customer its own URL list; a failed customer's result is then None.
+def fetch_all(auth_url, data_url, clients, parse, concurrency=DEFAULT_MAX_CONCURRENCY, timeout=30):
+    if callable(data_url):
+        return asyncio.run(_fetch_all(auth_url, data_url, list(clients), parse, concurrency, timeout))
+
+    single = isinstance(data_url, str)
+    data_urls = [data_url] if single else list(data_url)
+
+    results = asyncio.run(_fetch_all(auth_url, data_urls, list(clients), parse, concurrency, timeout))
+
+    if single:
+        return [result[0] if result else None for result in results]
+    return [result if result else [None] * len(data_urls) for result in results]
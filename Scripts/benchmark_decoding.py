@@ -0,0 +1,99 @@
+import os
+import glob
+import json
+import time
+import argparse
+import tracemalloc
+import pandas as pd
+from roaming_decode import decode_payload, ijson
+
+# Compare the old list-of-dicts decoding with the columnar and streaming decoders on recorded payloads
+SAMPLES_DIR = "Samples"
+
+
+# The decoding fetch_customer_data used before: one dict per (entry, type) row, then pd.DataFrame(list)
+def decode_list_of_dicts(body, account_name):
+    roaming_data = json.loads(body).get('results', [])
+    data = []
+    for entry in roaming_data:
+        adapter = entry.get('driverProvider', 'Unknown')
+        driver = entry.get('driverVersion', 'Unknown')
+        adapter_driver = f"{adapter} - {driver}"
+
+        for type_info in entry.get("types", []):
+            data.append({
+                "Account Name": account_name,
+                "Adapter": adapter,
+                "Driver": driver,
+                "Adapter-Driver": adapter_driver,
+                "goodSum": type_info.get("goodSum", 0),
+                "criticalSum": type_info.get("criticalSum", 0),
+                "warningSum": type_info.get("warningSum", 0),
+                "clientCount": entry.get("clientCount", 0)
+            })
+    return pd.DataFrame(data)
+
+
+DECODERS = {
+    "list of dicts": decode_list_of_dicts,
+    "columnar": lambda body, account_name: decode_payload(body, account_name, stream=False),
+}
+if ijson is not None:
+    DECODERS["columnar streaming"] = lambda body, account_name: decode_payload(body, account_name, stream=True)
+
+
+# Replicate a recorded payload's entries to simulate a larger tenant
+def scale_payload(body, factor):
+    payload = json.loads(body)
+    payload['results'] = payload.get('results', []) * factor
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+
+def measure(decoder, body, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decoder(body, "Sample Account")
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    decoder(body, "Sample Account")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark adapter-drivers response decoding.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="Replication factors applied to each sample")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per decoder (best is reported)")
+    args = parser.parse_args()
+
+    samples = sorted(glob.glob(os.path.join(SAMPLES_DIR, "adapter_drivers*.json")))
+    if not samples:
+        print(f"❌ No recorded payloads found in {SAMPLES_DIR}")
+        return
+
+    for sample in samples:
+        with open(sample, 'rb') as f:
+            recorded = f.read()
+
+        for factor in args.scales:
+            body = scale_payload(recorded, factor)
+
+            # All decoders must agree before their timings mean anything (the columnar ones return categoricals)
+            reference = decode_list_of_dicts(body, "Sample Account")
+            for name, decoder in DECODERS.items():
+                decoded = decoder(body, "Sample Account")
+                pd.testing.assert_frame_equal(reference, decoded, check_dtype=False, check_categorical=False)
+
+            print(f"\n{os.path.basename(sample)} x{factor}: {len(reference):,} rows, {len(body) / 1024:,.0f} KiB")
+            baseline = None
+            for name, decoder in DECODERS.items():
+                seconds, peak = measure(decoder, body, args.repeat)
+                baseline = baseline or seconds
+                print(f"  {name:<20} {seconds * 1000:9.2f} ms  {baseline / seconds:5.2f}x  peak {peak / 1024 / 1024:7.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
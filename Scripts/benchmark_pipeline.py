@@ -0,0 +1,150 @@
+import os
+import io
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+import pandas as pd
+import aggregate_all
+import aggregate_roaming_data as aggregate
+import merge_with_vintage as merge
+import calculate_manufacturers_and_samples as manufacturers
+import aggregate_critical_roaming_minutes as critical
+import find_good_drivers_per_acct as reports
+from driver_index import DriverIndex
+from roaming_cube import RoamingCube
+from history_store import read_history
+from generate_synthetic_data import generate
+
+# Times and memory-profiles each pipeline stage on synthetic data at several scales (customers x adapter-drivers x days)
+DEFAULT_SCALES = ["20x500x30", "100x2000x90", "400x5000x365"]
+
+
+def run_aggregate_cold():
+    aggregate.combine_and_aggregate_roaming_data("History", rebuild=True)
+
+
+def run_aggregate_cached():
+    aggregate.combine_and_aggregate_roaming_data("History")
+
+
+# Aggregates, critical minutes, manufacturers and total samples from one History scan
+def run_aggregate_all_cold():
+    aggregate_all.write_all(aggregate_all.aggregate_all("History", rebuild=True))
+
+
+# Last-30-days aggregates from the date x driver cube (built on the first run, reused after)
+def run_cube_window():
+    cube = RoamingCube.build("History")
+    cube.aggregated(cube.last_days_start(30))
+
+
+def run_merge():
+    merge.write_merged(merge.merge_vintage(pd.read_csv(merge.file1_path), pd.read_csv(merge.file2_path)))
+
+
+def run_manufacturers():
+    manufacturers.calculate_manufacturers(manufacturers.input_file, manufacturers.manufacturers_output_file)
+    manufacturers.sum_total_sum(manufacturers.input_file, manufacturers.total_samples_output_file)
+
+
+def run_critical():
+    history_df = read_history(columns=["Critical Sum"], folder_path=critical.input_directory)
+    critical.write_critical_minutes(critical.critical_minutes_summary(history_df["Critical Sum"].sum()))
+
+
+# Every account's Excel report, in this process so its memory is traced
+def run_reports():
+    os.makedirs(reports.output_dir, exist_ok=True)
+    reports._init_worker(DriverIndex.from_csv())
+    for filename in sorted(os.listdir(reports.account_history_dir)):
+        if filename.startswith("bad_drivers") and filename.endswith(".csv"):
+            reports.render_account_report(filename)
+
+
+# In pipeline order: each stage reads what the one before it wrote
+STAGES = {
+    "aggregate (cold)": run_aggregate_cold,
+    "aggregate (cached)": run_aggregate_cached,
+    "aggregate all (cold)": run_aggregate_all_cold,
+    "cube 30-day window": run_cube_window,
+    "merge": run_merge,
+    "manufacturers": run_manufacturers,
+    "critical minutes": run_critical,
+    "excel reports": run_reports,
+}
+
+
+# Best wall-clock time over untraced runs, then one traced run for peak Python/NumPy allocation (Arrow buffers aren't traced)
+def measure(stage, repeat):
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            stage()
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def parse_scale(scale):
+    customers, adapter_drivers, days = (int(part) for part in scale.lower().split("x"))
+    return customers, adapter_drivers, days
+
+
+def benchmark_scale(scale, repeat, history_format, keep):
+    customers, adapter_drivers, days = parse_scale(scale)
+    data_dir = tempfile.mkdtemp(prefix=f"roaming_bench_{scale}_")
+    cwd = os.getcwd()
+
+    try:
+        start = time.perf_counter()
+        summary = generate(data_dir, customers, adapter_drivers, days, history_format)
+        print(f"\n{scale} (customers x adapter-drivers x days): {summary['merged_rows']:,} merged rows, "
+              f"{summary['bad_driver_files']} bad driver file(s), generated in {time.perf_counter() - start:.1f}s")
+
+        # The stages use repo-relative paths (History/, Output/), so run them from the data directory
+        os.chdir(data_dir)
+        results = []
+        for name, stage in STAGES.items():
+            seconds, peak = measure(stage, repeat)
+            results.append({"scale": scale, "stage": name, "seconds": seconds, "peak_bytes": peak})
+            print(f"  {name:<20} {seconds * 1000:10.1f} ms  peak {peak / 1024 / 1024:8.1f} MiB")
+        return results
+    finally:
+        os.chdir(cwd)
+        if keep:
+            print(f"  data kept in {data_dir}")
+        else:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data.")
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES,
+                        help="customers x adapter-drivers x days, e.g. 100x2000x90")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is reported)")
+    parser.add_argument("--history-format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated data directories")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        results.extend(benchmark_scale(scale, args.repeat, args.history_format, args.keep))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
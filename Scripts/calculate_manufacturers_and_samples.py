@@ -1,10 +1,13 @@
 import pandas as pd
 import re  # Import regex module
+from run_metrics import stage
 
-def calculate_manufacturers(input_file, output_file):
-    # Load the CSV file
-    df = pd.read_csv(input_file)
+# Manufacturer of an Adapter-Driver: its first word without (R) or ® symbols
+def manufacturer_name(value):
+    return re.sub(r'\(R\)|®', '', str(value).split()[0]) if isinstance(value, str) else "Unknown"
 
+# Share of Adapter-Driver rows per manufacturer
+def manufacturer_shares(df):
     # Identify the column containing manufacturer data
     if "Manufacturer" in df.columns:
         manufacturer_column = "Manufacturer"
@@ -14,43 +17,51 @@ def calculate_manufacturers(input_file, output_file):
         raise ValueError("No Manufacturer-related column found in the CSV file.")
 
     # Extract manufacturer names and remove (R) or ® symbols
-    df["Manufacturer"] = df[manufacturer_column].apply(lambda x: re.sub(r'\(R\)|®', '', str(x).split()[0]) if isinstance(x, str) else "Unknown")
+    manufacturers = df[manufacturer_column].apply(manufacturer_name)
 
     # Count occurrences of each manufacturer
-    manufacturer_counts = df["Manufacturer"].value_counts()
+    manufacturer_counts = manufacturers.value_counts()
 
     # Convert to percentages
     manufacturer_percentages = (manufacturer_counts / manufacturer_counts.sum()) * 100
 
     # Create a DataFrame for output
-    output_df = pd.DataFrame({
+    return pd.DataFrame({
         "Manufacturer": manufacturer_percentages.index,
         "Percentage": manufacturer_percentages.values
     })
 
+def total_samples(df):
+    # Sum the 'Total Sum' column
+    total_sum_value = df['Total Sum'].sum()
+
+    # Create a new dataframe to store the result
+    return pd.DataFrame({'Total Sum': [total_sum_value]})
+
+def calculate_manufacturers(input_file, output_file):
+    # Load the CSV file
+    df = pd.read_csv(input_file)
+
     # Save the results to a CSV file
-    output_df.to_csv(output_file, index=False)
-    print(f"✅ Manufacturers data saved to {manufacturers_output_file}")
+    manufacturer_shares(df).to_csv(output_file, index=False)
+    print(f"✅ Manufacturers data saved to {output_file}")
 
 def sum_total_sum(input_file, output_file):
     # Load the CSV file
     df = pd.read_csv(input_file)
-    
-    # Sum the 'Total Sum' column
-    total_sum_value = df['Total Sum'].sum()
-    
-    # Create a new dataframe to store the result
-    total_sum_df = pd.DataFrame({'Total Sum': [total_sum_value]})
-    
+
     # Save to CSV
-    total_sum_df.to_csv(output_file, index=False)
-    print(f"✅ Total samples data successfully saved to: {total_samples_output_file}")
+    total_samples(df).to_csv(output_file, index=False)
+    print(f"✅ Total samples data successfully saved to: {output_file}")
 
 # Define file paths
 input_file = "Output/merged_roaming_analysis_with_vintage.csv"
 manufacturers_output_file = "Output/manufacturers.csv"
 total_samples_output_file = "Output/total_samples.csv"
 
-# Run the functions
-calculate_manufacturers(input_file, manufacturers_output_file)
-sum_total_sum(input_file, total_samples_output_file)
+if __name__ == "__main__":
+    # Run the functions
+    with stage("manufacturers"):
+        calculate_manufacturers(input_file, manufacturers_output_file)
+    with stage("total samples"):
+        sum_total_sum(input_file, total_samples_output_file)
@@ -0,0 +1,87 @@
+import time
+import random
+import threading
+import requests
+from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Browser-free Microsoft Update Catalog lookups: plain HTTP search requests, result table parsed with BeautifulSoup
+CATALOG_SEARCH_URL = "https://www.catalog.update.microsoft.com/Search.aspx"
+RESULTS_TABLE_ID = "ctl00_catalogBody_updateMatches"
+
+NOT_FOUND = "Not Found"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml"
+}
+
+
+# Spaces request starts at least min_interval seconds apart across all worker threads, plus a little jitter
+class RateLimiter:
+    def __init__(self, requests_per_second, jitter=0.25):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._next_start = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval * (1 + random.uniform(0, self.jitter))
+        if start > now:
+            time.sleep(start - now)
+
+
+# "Last Updated" of the first search result, or NOT_FOUND when the page has no results table
+def parse_last_updated(html):
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table", id=RESULTS_TABLE_ID)
+    if table is None:
+        return NOT_FOUND
+
+    rows = table.find_all("tr")
+    if len(rows) < 2:
+        return NOT_FOUND
+
+    # Locate the column by its header, falling back to the 5th cell the Selenium XPath used
+    header_cells = [cell.get_text(" ", strip=True) for cell in rows[0].find_all(["td", "th"])]
+    column = next((i for i, text in enumerate(header_cells) if text.startswith("Last Updated")), 4)
+
+    cells = rows[1].find_all("td")
+    if column >= len(cells):
+        return NOT_FOUND
+    return cells[column].get_text(strip=True) or NOT_FOUND
+
+
+_session = threading.local()
+
+
+def _get_session():
+    if not hasattr(_session, "value"):
+        _session.value = requests.Session()
+        _session.value.headers.update(HEADERS)
+    return _session.value
+
+
+# The vintage, NOT_FOUND when the catalog answered without results, or None when the search itself failed
+# (network error, timeout, 5xx): only a real "no results" page is worth remembering
+def lookup_vintage(adapter, limiter, base_url=CATALOG_SEARCH_URL, timeout=30):
+    limiter.wait()
+    try:
+        response = _get_session().get(base_url, params={"q": adapter}, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"❌ Error processing '{adapter}': {e}")
+        return None
+    return parse_last_updated(response.text)
+
+
+# Look up adapters on a bounded pool of workers; yields (adapter, vintage) as each lookup finishes
+def iter_vintages(adapters, workers=4, requests_per_second=2.0, base_url=CATALOG_SEARCH_URL):
+    limiter = RateLimiter(requests_per_second)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(lookup_vintage, adapter, limiter, base_url): adapter for adapter in adapters}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,133 @@
+import os
+import gzip
+import json
+import hashlib
+
+# brotli gives smaller .br siblings; without it only .gz siblings are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Dashboard JSON: the merged analysis serialized once, compact, in two layouts:
+#   data.json: records, [{"Adapter-Driver": ..., ...}, ...]
+#   data.columns.json: columns, {"columns": [...], "rows": n, "data": [[first column's values], ...]}
+# Each file gets precompressed .gz/.br siblings and an entry (sha256, ETag, sizes) in dashboard_manifest.json.
+# A file whose content hash matches the manifest is left untouched, so unchanged data causes no rewrite.
+# merged_roaming_analysis_with_vintage.json, the records' older published name, is kept for existing readers as a
+# plain copy of data.json (no compressed siblings) and listed under "aliases" in the manifest; new readers should
+# use data.json.
+output_dir = "Output"
+RECORDS_FILE = "data.json"
+RECORDS_ALIASES = ["merged_roaming_analysis_with_vintage.json"]
+COLUMNS_FILE = "data.columns.json"
+MANIFEST_FILE = "dashboard_manifest.json"
+
+
+def records_json(df):
+    return df.to_json(orient="records").encode()
+
+
+# Column-oriented layout: each column's values once, no repeated keys per row
+def columns_json(df):
+    columns = ",".join(df[col].to_json(orient="values") for col in df.columns)
+    return f'{{"columns":{json.dumps(list(df.columns))},"rows":{len(df)},"data":[{columns}]}}'.encode()
+
+
+# Suffixes of the precompressed siblings written next to every file
+def compressed_suffixes():
+    return [".gz"] + ([".br"] if brotli is not None else [])
+
+
+# Compressed siblings of a payload; gzip with a fixed mtime so identical data gives identical bytes
+def compressed_variants(payload):
+    variants = {".gz": gzip.compress(payload, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(payload, quality=11)
+    return variants
+
+
+def _load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _read_bytes(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_bytes(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+# Write one payload and its siblings unless the manifest shows the same content is already there; returns (entry, written)
+def _export_file(directory, name, payload, previous):
+    path = os.path.join(directory, name)
+    sha256 = hashlib.sha256(payload).hexdigest()
+    suffixes = compressed_suffixes()
+
+    if previous and previous.get("sha256") == sha256 \
+            and sorted(previous.get("encodings", {})) == sorted(suffix.lstrip(".") for suffix in suffixes) \
+            and os.path.exists(path) and os.path.getsize(path) == len(payload) \
+            and all(os.path.exists(path + suffix) for suffix in suffixes):
+        return previous, False
+
+    variants = compressed_variants(payload)
+    _write_bytes(path, payload)
+    for suffix, compressed in variants.items():
+        _write_bytes(path + suffix, compressed)
+
+    entry = {
+        "sha256": sha256,
+        "etag": f'"{sha256[:32]}"',
+        "bytes": len(payload),
+        "encodings": {suffix.lstrip("."): len(compressed) for suffix, compressed in variants.items()},
+    }
+    return entry, True
+
+
+def export_dashboard(merged_df, directory=output_dir):
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    previous = _load_manifest(manifest_path)
+    previous_files = previous.get("files", {})
+
+    payloads = {RECORDS_FILE: records_json(merged_df), COLUMNS_FILE: columns_json(merged_df)}
+
+    files = {}
+    for name, payload in payloads.items():
+        files[name], written = _export_file(directory, name, payload, previous_files.get(name))
+        if written:
+            print(f"✅ JSON output saved to: {os.path.join(directory, name)} ({len(payload):,} bytes)")
+        else:
+            print(f"⏭️ {os.path.join(directory, name)} unchanged, not rewritten")
+
+    # Legacy names get the same records bytes, rewritten only when they differ
+    aliases = {alias: RECORDS_FILE for alias in RECORDS_ALIASES}
+    for alias in RECORDS_ALIASES:
+        path = os.path.join(directory, alias)
+        if _read_bytes(path) != payloads[RECORDS_FILE]:
+            _write_bytes(path, payloads[RECORDS_FILE])
+            print(f"✅ JSON output saved to: {path} (copy of {RECORDS_FILE})")
+
+    manifest = {"files": files, "aliases": aliases}
+    if manifest != previous:
+        _write_bytes(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return files
+
+
+# Every file export_dashboard() writes under directory (for stage output lists)
+def dashboard_outputs(directory=output_dir):
+    suffixes = [""] + compressed_suffixes()
+    return [os.path.join(directory, name + suffix) for name in [RECORDS_FILE, COLUMNS_FILE] for suffix in suffixes] + \
+        [os.path.join(directory, name) for name in RECORDS_ALIASES + [MANIFEST_FILE]]
@@ -0,0 +1,131 @@
+import os
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+# Shared dictionary encoding of the adapter/driver strings. Every distinct (Adapter, Driver, Adapter-Driver) gets a
+# stable integer ID in a persistent table, so the aggregation cache, the cube and the per-file sums carry one int32
+# per row and group on integers; the strings are looked at once per distinct value and decoded as categoricals.
+# IDs are only ever appended; the table's generation changes when it is created anew, so caches holding IDs from
+# an older table can tell.
+IDS_FILE = os.path.join(".cache", "driver_ids.parquet")
+
+KEY_COLUMNS = ['Adapter', 'Driver', 'Adapter-Driver']
+ID_COLUMN = 'Driver ID'
+ID_DTYPE = np.int32
+
+
+# int32 for integer columns whose values fit (per-row counts do; pandas sums them up as int64)
+def compact_ints(df, columns):
+    limits = np.iinfo(np.int32)
+    for col in columns:
+        values = df[col].to_numpy()
+        if len(values) and values.min() >= limits.min and values.max() <= limits.max:
+            df[col] = values.astype(np.int32)
+    return df
+
+
+# Adapter-Driver ("<adapter> - <driver>") for two columns, concatenated once per distinct pair instead of per row;
+# returns a categorical
+def adapter_driver_key(adapter, driver):
+    adapter = adapter.astype('category')
+    driver = driver.astype('category')
+    adapter_codes = adapter.cat.codes.to_numpy(dtype=np.int64)
+    driver_codes = driver.cat.codes.to_numpy(dtype=np.int64)
+
+    # A missing adapter or driver (code -1) gives a missing key, as string concatenation would
+    n_drivers = len(driver.cat.categories)
+    pair_codes = np.where((adapter_codes < 0) | (driver_codes < 0), -1, adapter_codes * n_drivers + driver_codes)
+    codes, pairs = pd.factorize(pair_codes, use_na_sentinel=False)
+
+    # Plain lists: indexing a pandas Index once per pair costs more than everything else here
+    adapter_names = adapter.cat.categories.to_numpy(dtype=object).tolist()
+    driver_names = driver.cat.categories.to_numpy(dtype=object).tolist()
+    keys = [None if pair < 0 else f"{adapter_names[pair // n_drivers]} - {driver_names[pair % n_drivers]}"
+            for pair in pairs.tolist()]
+
+    categories = sorted(set(key for key in keys if key is not None))
+    positions = {key: i for i, key in enumerate(categories)}
+    pair_positions = np.array([-1 if key is None else positions[key] for key in keys], dtype=np.int64)
+    return pd.Series(pd.Categorical.from_codes(pair_positions[codes], categories=categories), index=adapter.index)
+
+
+# pd.concat for frames with categorical columns: categories are merged (sorted) instead of falling back to objects
+def concat_coded(frames):
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return pd.DataFrame()
+    columns = {}
+    for col in frames[0].columns:
+        values = [frame[col] for frame in frames]
+        if all(isinstance(value.dtype, pd.CategoricalDtype) for value in values):
+            columns[col] = union_categoricals([value.cat.remove_unused_categories() for value in values], sort_categories=True)
+        else:
+            columns[col] = pd.concat(values, ignore_index=True)
+    return pd.DataFrame({col: pd.Series(values).reset_index(drop=True) for col, values in columns.items()})
+
+
+def _key(value):
+    return None if value is None or (not isinstance(value, str) and pd.isna(value)) else str(value)
+
+
+class DriverIds:
+    def __init__(self, path=IDS_FILE):
+        self.path = path
+        self.keys = []
+        self.generation = None
+        try:
+            table = pq.read_table(path)
+            self.generation = (table.schema.metadata or {}).get(b'generation', b'').decode() or None
+            columns = [table.column(col).to_pylist() for col in KEY_COLUMNS]
+            self.keys = list(zip(*columns))
+        except (OSError, ValueError, KeyError, pa.ArrowException):
+            pass
+        if self.generation is None:
+            self.keys = []
+            self.generation = uuid.uuid4().hex
+        self._ids = {key: i for i, key in enumerate(self.keys)}
+        self._saved = len(self.keys) if os.path.exists(path) else -1
+        self._frame = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    # int32 ID per row of df's Adapter, Driver and Adapter-Driver columns; new combinations are added to the table
+    def encode(self, df):
+        columns = [df[col].to_numpy(dtype=object) for col in KEY_COLUMNS]
+        lookup = self._ids.get
+        ids = np.fromiter((lookup(key, -1) for key in zip(*columns)), dtype=np.int64, count=len(df))
+
+        # Unseen combinations (and missing values, which only match once normalized) are added one by one
+        for row in np.flatnonzero(ids < 0):
+            key = tuple(_key(column[row]) for column in columns)
+            if key not in self._ids:
+                self._ids[key] = len(self.keys)
+                self.keys.append(key)
+                self._frame = None
+            ids[row] = self._ids[key]
+        return ids.astype(ID_DTYPE)
+
+    # Adapter, Driver and Adapter-Driver (categoricals) for an array of IDs
+    def decode(self, ids):
+        if self._frame is None:
+            table = pd.DataFrame(self.keys, columns=KEY_COLUMNS, dtype=object)
+            self._frame = table.astype('category')
+        return self._frame.take(np.asarray(ids, dtype=np.int64)).reset_index(drop=True)
+
+    # Write the table when IDs were added since it was loaded
+    def save(self):
+        if len(self.keys) == self._saved:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        columns = list(zip(*self.keys)) if self.keys else [(), (), ()]
+        table = pa.table({col: pa.array(list(values), type=pa.string()) for col, values in zip(KEY_COLUMNS, columns)})
+        table = table.replace_schema_metadata({'generation': self.generation})
+        tmp_path = f"{self.path}.tmp"
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, self.path)
+        self._saved = len(self.keys)
@@ -0,0 +1,113 @@
+import pandas as pd
+from itertools import takewhile
+from collections import namedtuple
+from driver_versions import DriverVersionIndex, normalize_adapter, parse_version
+
+# Per-adapter index over the merged analysis: built once, then every recommendation is a dictionary lookup
+merged_file_path = "Output/merged_roaming_analysis_with_vintage.csv"
+
+# Drivers above this good-roaming % are recommended as replacements
+GOOD_THRESHOLD = 99.5
+
+# One driver of an adapter; 'row' is its position in the merged file (keeps report order stable)
+# 'version' is the parsed driver version (None when the driver string has no digits)
+DriverEntry = namedtuple("DriverEntry", ["adapter", "driver", "adapter_driver", "good_pct", "total_sum", "vintage", "row", "version"])
+
+
+def _value(value):
+    return None if pd.isna(value) else value
+
+
+class DriverIndex:
+    # {normalized adapter: [DriverEntry, ...]} sorted by good-roaming % then vintage, best first
+    def __init__(self, merged_df):
+        self._by_adapter = {}
+
+        columns = {col.strip().lower(): col for col in merged_df.columns}
+        good_pct = pd.to_numeric(merged_df[columns['good roaming calculation (%)']], errors='coerce')
+        vintage = merged_df[columns['driver vintage']] if 'driver vintage' in columns else pd.Series(None, index=merged_df.index)
+        total_sum = merged_df[columns['total sum']] if 'total sum' in columns else pd.Series(None, index=merged_df.index)
+
+        records = zip(merged_df[columns['adapter']], merged_df[columns['driver']], merged_df[columns['adapter-driver']],
+                      good_pct, total_sum, vintage)
+        for row, (adapter, driver, adapter_driver, pct, total, released) in enumerate(records):
+            if pd.isna(adapter):
+                continue
+            entry = DriverEntry(adapter, _value(driver), _value(adapter_driver), _value(pct), _value(total), _value(released), row,
+                                parse_version(driver))
+            self._by_adapter.setdefault(normalize_adapter(adapter), []).append(entry)
+
+        # Best first: highest good-roaming %, newest vintage breaking ties; unknown values sort last
+        for entries in self._by_adapter.values():
+            entries.sort(key=lambda e: (e.vintage is not None, str(e.vintage or "")), reverse=True)
+            entries.sort(key=lambda e: (e.good_pct is not None, e.good_pct or 0.0), reverse=True)
+
+        self.versions = DriverVersionIndex(merged_df)
+
+    @classmethod
+    def from_csv(cls, path=merged_file_path):
+        return cls(pd.read_csv(path))
+
+    def __contains__(self, adapter):
+        return normalize_adapter(adapter) in self._by_adapter
+
+    def __len__(self):
+        return len(self._by_adapter)
+
+    def adapters(self):
+        return list(self._by_adapter)
+
+    # Every known driver of an adapter, best first
+    def drivers(self, adapter):
+        return list(self._by_adapter.get(normalize_adapter(adapter), ()))
+
+    # Drivers of an adapter above the good-roaming threshold, best first
+    def good_drivers(self, adapter, threshold=GOOD_THRESHOLD):
+        entries = self._by_adapter.get(normalize_adapter(adapter), ())
+        return list(takewhile(lambda e: e.good_pct is not None and e.good_pct > threshold, entries))
+
+    # Good drivers for a set of adapters (e.g. one account's bad adapters), in merged-file order
+    def recommendations(self, adapters, threshold=GOOD_THRESHOLD):
+        entries = []
+        for adapter in dict.fromkeys(normalize_adapter(a) for a in adapters):
+            entries.extend(self.good_drivers(adapter, threshold))
+        return sorted(entries, key=lambda e: e.row)
+
+    # Best good driver newer than the given driver version, or None when there is no upgrade.
+    # "Newer" is judged by parsed version number (binary search in the version index); when the given version has
+    # no digits to compare, Driver Vintage decides, and if that is unknown too any other good driver qualifies.
+    def best_upgrade(self, adapter, newer_than=None, threshold=GOOD_THRESHOLD):
+        candidates = self.good_drivers(adapter, threshold)
+        if newer_than is None:
+            return candidates[0] if candidates else None
+
+        newer_than = str(newer_than).strip()
+        if parse_version(newer_than) is not None:
+            newer_rows = {e.row for e in self.versions.newer_than(adapter, newer_than)}
+            return next((entry for entry in candidates if entry.row in newer_rows), None)
+
+        current = next((e for e in self._by_adapter.get(normalize_adapter(adapter), ()) if str(e.driver).strip() == newer_than), None)
+        current_vintage = str(current.vintage) if current is not None and current.vintage is not None else None
+
+        for entry in candidates:
+            if str(entry.driver).strip() == newer_than:
+                continue
+            if current_vintage is None or (entry.vintage is not None and str(entry.vintage) > current_vintage):
+                return entry
+        return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Look up the best driver upgrade for an adapter.")
+    parser.add_argument("adapter", help="Adapter name (case-insensitive)")
+    parser.add_argument("--newer-than", default=None, help="Only suggest drivers with a higher version than this one")
+    parser.add_argument("--threshold", type=float, default=GOOD_THRESHOLD, help="Minimum good roaming %%")
+    args = parser.parse_args()
+
+    index = DriverIndex.from_csv()
+    best = index.best_upgrade(args.adapter, args.newer_than, args.threshold)
+    if best is None:
+        print(f"❌ No upgrade found for {args.adapter}.")
+    else:
+        print(f"✅ {best.adapter_driver} ({best.good_pct}% good roaming, released {best.vintage or 'unknown'})")
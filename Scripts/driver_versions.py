@@ -0,0 +1,153 @@
+import re
+import bisect
+import pandas as pd
+from collections import namedtuple
+from normalization import default_normalizer
+
+# Driver versions as comparable numbers: "22.130.0.5" -> (22, 130, 0, 5), so 22.150.0.3 sorts after 22.130.0.5
+# and 6001.15.155.1 after 6001.15.149.100 (as strings both orders come out wrong). Per adapter, every known
+# driver is kept in version order, so "latest", "newer than X" and "how far apart" are binary searches.
+aggregated_file_path = "Output/aggregated_roaming_data.csv"
+
+_number = re.compile(r'\d+')
+
+# One known driver of an adapter; 'row' is its position in the source file
+VersionEntry = namedtuple("VersionEntry", ["version", "driver", "adapter", "adapter_driver", "row"])
+
+
+# How adapter names are compared: the "adapter_key" normalization rules, remembered per distinct name
+def normalize_adapter(adapter):
+    return default_normalizer().value("adapter_key", "Adapter", str(adapter))
+
+
+# Numeric version tuple, trailing zero components dropped so 1.2 == 1.2.0.0; None when there are no digits
+def parse_version(driver):
+    if driver is None or (not isinstance(driver, str) and pd.isna(driver)):
+        return None
+    parts = [int(part) for part in _number.findall(str(driver))]
+    if not parts:
+        return None
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+# How far apart two versions are: (first differing component, signed difference there); (None, 0) when equal.
+# E.g. 22.130.0.5 -> 22.150.1.1 is (1, 20): the second component moved by 20.
+def version_delta(older, newer):
+    older, newer = parse_version(older), parse_version(newer)
+    if older is None or newer is None:
+        return None
+    for position in range(max(len(older), len(newer))):
+        a = older[position] if position < len(older) else 0
+        b = newer[position] if position < len(newer) else 0
+        if a != b:
+            return position, b - a
+    return None, 0
+
+
+class DriverVersionIndex:
+    # {normalized adapter: [VersionEntry, ...]} in ascending version order, with the version keys alongside for bisect
+    def __init__(self, df):
+        by_adapter = {}
+        records = zip(df['Adapter'], df['Driver'], df['Adapter-Driver'])
+        for row, (adapter, driver, adapter_driver) in enumerate(records):
+            version = parse_version(driver)
+            if version is None or pd.isna(adapter):
+                continue
+            by_adapter.setdefault(normalize_adapter(adapter), []).append(
+                VersionEntry(version, driver, adapter, adapter_driver, row))
+
+        self._entries = {}
+        self._keys = {}
+        for adapter, entries in by_adapter.items():
+            entries.sort(key=lambda e: (e.version, e.row))
+            self._entries[adapter] = entries
+            self._keys[adapter] = [e.version for e in entries]
+
+    @classmethod
+    def from_csv(cls, path=aggregated_file_path):
+        return cls(pd.read_csv(path))
+
+    def __contains__(self, adapter):
+        return normalize_adapter(adapter) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Every known driver of an adapter, oldest version first
+    def versions(self, adapter):
+        return list(self._entries.get(normalize_adapter(adapter), ()))
+
+    def latest(self, adapter):
+        entries = self._entries.get(normalize_adapter(adapter))
+        return entries[-1] if entries else None
+
+    # Known drivers with a higher version than `driver` (which needn't be known itself), oldest first
+    def newer_than(self, adapter, driver):
+        version = parse_version(driver)
+        adapter = normalize_adapter(adapter)
+        if version is None or adapter not in self._entries:
+            return []
+        return self._entries[adapter][bisect.bisect_right(self._keys[adapter], version):]
+
+    # Known drivers with a lower version than `driver`, oldest first
+    def older_than(self, adapter, driver):
+        version = parse_version(driver)
+        adapter = normalize_adapter(adapter)
+        if version is None or adapter not in self._entries:
+            return []
+        return self._entries[adapter][:bisect.bisect_left(self._keys[adapter], version)]
+
+    # Known releases from `older` (exclusive) up to `newer` (inclusive): how many versions behind `older` is
+    def releases_between(self, adapter, older, newer):
+        older, newer = parse_version(older), parse_version(newer)
+        adapter = normalize_adapter(adapter)
+        if older is None or newer is None or adapter not in self._entries:
+            return None
+        keys = self._keys[adapter]
+        return max(0, bisect.bisect_right(keys, newer) - bisect.bisect_right(keys, older))
+
+    # How far `driver` is behind the adapter's latest known driver
+    def distance_to_latest(self, adapter, driver):
+        latest = self.latest(adapter)
+        if latest is None or parse_version(driver) is None:
+            return None
+        return {
+            "latest": latest.driver,
+            "delta": version_delta(driver, latest.driver),
+            "releases_behind": self.releases_between(adapter, driver, latest.driver),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query known driver versions of an adapter.")
+    parser.add_argument("adapter", help="Adapter name (case-insensitive)")
+    parser.add_argument("--newer-than", default=None, help="List known drivers newer than this version")
+    parser.add_argument("--distance", default=None, help="Show how far this version is behind the latest known one")
+    parser.add_argument("--source", default=aggregated_file_path, help="Aggregated (or merged) CSV to index")
+    args = parser.parse_args()
+
+    index = DriverVersionIndex.from_csv(args.source)
+    latest = index.latest(args.adapter)
+    if latest is None:
+        print(f"❌ No known drivers for {args.adapter}.")
+        raise SystemExit(1)
+    print(f"✅ Latest known driver: {latest.adapter_driver}")
+
+    if args.newer_than:
+        newer = index.newer_than(args.adapter, args.newer_than)
+        print(f"{len(newer)} known driver(s) newer than {args.newer_than}:")
+        for entry in newer:
+            print(f"   - {entry.driver}")
+
+    if args.distance:
+        distance = index.distance_to_latest(args.adapter, args.distance)
+        if distance is None:
+            print(f"❌ {args.distance} is not a version number.")
+        else:
+            position, difference = distance["delta"]
+            where = "up to date" if position is None else f"component {position + 1} differs by {difference}"
+            print(f"{args.distance} -> {distance['latest']}: {where}, {distance['releases_behind']} known release(s) behind")
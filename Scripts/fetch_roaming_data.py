@@ -0,0 +1,76 @@
+import argparse
+import pandas as pd
+from async_fetch import fetch_all
+from run_metrics import stage, lost_customers
+from fetch_scheduler import DEFAULT_MAX_CONCURRENCY, report_lost
+from account_store import AccountStore
+import get_roaming_data_fast as daily
+import find_bad_drivers_per_acct as per_account
+
+# Single fetch stage: each customer is authenticated once and both the daily window (History rollup)
+# and the days its per-account history is missing are pulled over the same pooled session;
+# the per-account bad driver reports then cover the last N days, read back from the local store.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch every customer once and write both the History rollup and the per-account reports.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Most requests in flight at once; the fetcher adapts below it to latency and throttling")
+    parser.add_argument("--days", type=int, default=per_account.WINDOW_DAYS,
+                        help="Days in each account's bad driver view (complete days, ending yesterday)")
+    parser.add_argument("--write-workers", type=int, default=8, help="Account CSVs written in parallel")
+    parser.add_argument("--combined", default=None,
+                        help="Also write every account's poor roamers to this single Parquet file (one row group per account)")
+    args = parser.parse_args()
+
+    # Read customer credentials and account names
+    customers_df = pd.read_excel(daily.EXCEL_PATH)
+    clients = list(zip(customers_df['client_id'], customers_df['client_secret'], customers_df['account_name']))
+
+    store = AccountStore()
+    missing = {client_id: store.missing_days(client_id, args.days) for client_id, _, _ in clients}
+
+    with stage("fetch", rows_in=len(customers_df)) as fetch_stage:
+        fetch_stage["days_fetched"] = sum(len(days) for days in missing.values())
+
+        # Each result is [daily frame, one frame per missing day], all keeping the 'Account Name' dimension
+        results = fetch_all(daily.AUTH_URL,
+                            lambda client_info: [daily.ROAMING_URL] + [per_account.day_url(day) for day in missing[client_info[0]]],
+                            clients, per_account.parse_roaming_data, concurrency=args.concurrency, timeout=30)
+
+        daily_frames = []
+        window_frames = []
+        for (client_id, _, account_name), result in zip(clients, results):
+            if result is None:
+                continue
+            if result[0] is not None:
+                daily_frames.append(result[0])
+            store.add_days(client_id, dict(zip(missing[client_id], result[1:])))
+
+            window_df = store.window(client_id, account_name, args.days)
+            if window_df is not None:
+                window_frames.append(window_df)
+        store.save()
+        fetch_stage["rows_out"] = sum(len(df) for df in daily_frames + window_frames)
+
+    report_lost(lost_customers())
+
+    if daily_frames:
+        with stage("history rollup", rows_in=sum(len(df) for df in daily_frames)) as rollup_stage:
+            master_df = daily.build_history_rollup(daily_frames)
+            rollup_stage["rows_out"] = len(master_df)
+            daily.write_history_file(master_df)
+    else:
+        print("⚠️ No valid daily data collected. History file was not created.")
+
+    if window_frames:
+        with stage("bad driver reports", rows_in=sum(len(df) for df in window_frames)) as reports_stage:
+            summary_df = per_account.build_account_summary(window_frames)
+            reports_stage["rows_out"] = len(summary_df)
+            per_account.write_bad_driver_reports(summary_df, workers=args.write_workers, combined_path=args.combined)
+    else:
+        print("⚠️ No valid per-account data collected. Bad driver reports were not updated.")
+
+
+if __name__ == "__main__":
+    main()
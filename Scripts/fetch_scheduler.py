@@ -0,0 +1,197 @@
+import time
+import random
+import asyncio
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from run_metrics import record_request
+
+# Shared by every fetcher: requests that fail transiently (connection errors, timeouts, 429 and 5xx) are retried with
+# jittered exponential backoff, honoring Retry-After, and the number of requests in flight adapts AIMD-style:
+# +1 per round of requests that come back quickly, halved on throttling, errors or a latency spike.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+RETRY_AFTER_MAX_SECONDS = 120
+
+INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_CONCURRENCY = 32
+
+# Back off when the smoothed latency climbs past this multiple of the best seen so far
+LATENCY_TOLERANCE = 2.0
+DECREASE_FACTOR = 0.5
+LATENCY_SMOOTHING = 0.2
+
+
+# Seconds to wait from a Retry-After header (delta-seconds or an HTTP date); None when absent or unreadable
+def retry_after_seconds(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+# Full-jitter exponential backoff, or the server's Retry-After (plus a little jitter so retries don't line up)
+def backoff_delay(attempt, retry_after=None):
+    if retry_after is not None:
+        return min(retry_after, RETRY_AFTER_MAX_SECONDS) + random.uniform(0, BACKOFF_BASE_SECONDS)
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+class AdaptiveLimit:
+    def __init__(self, maximum=DEFAULT_MAX_CONCURRENCY, initial=INITIAL_CONCURRENCY, minimum=1):
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self._async_changed = None
+        self.reset(maximum, initial, minimum)
+
+    # Start over (e.g. for a new run or load-test trial) with new bounds
+    def reset(self, maximum=DEFAULT_MAX_CONCURRENCY, initial=INITIAL_CONCURRENCY, minimum=1):
+        with self.lock:
+            self.maximum = max(1, maximum)
+            self.minimum = max(1, min(minimum, self.maximum))
+            self.limit = float(min(max(initial, self.minimum), self.maximum))
+            self.in_flight = 0
+            self.latency = None
+            self.best_latency = None
+            self.last_decrease = 0.0
+            self.peak = self.limit
+            self.decreases = 0
+
+    @property
+    def allowed(self):
+        return max(self.minimum, int(self.limit))
+
+    # Halve at most once per smoothed round trip, so one burst of 429s counts as one signal
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self.last_decrease < max(self.latency or 0.0, 0.05):
+            return
+        self.limit = max(float(self.minimum), self.limit * DECREASE_FACTOR)
+        self.last_decrease = now
+        self.decreases += 1
+
+    # Feed back one request: its latency when it succeeded, or congested=True for throttling, 5xx and timeouts
+    def record(self, latency=None, congested=False):
+        with self.changed:
+            if congested:
+                self._decrease()
+            elif latency is not None:
+                self.latency = latency if self.latency is None else \
+                    (1 - LATENCY_SMOOTHING) * self.latency + LATENCY_SMOOTHING * latency
+                self.best_latency = self.latency if self.best_latency is None else min(self.best_latency, self.latency)
+                if self.latency > LATENCY_TOLERANCE * self.best_latency:
+                    self._decrease()
+                else:
+                    self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+                    self.peak = max(self.peak, self.limit)
+            self.changed.notify_all()
+        self._wake_async()
+
+    # Thread side: wait for a free slot under the current limit
+    def acquire(self):
+        with self.changed:
+            while self.in_flight >= self.allowed:
+                self.changed.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.changed:
+            self.in_flight -= 1
+            self.changed.notify_all()
+        self._wake_async()
+
+    # asyncio side (one event loop): the same slots, waited for without blocking the loop
+    async def acquire_async(self):
+        if self._async_changed is None:
+            self._async_changed = asyncio.Event()
+        while True:
+            with self.lock:
+                if self.in_flight < self.allowed:
+                    self.in_flight += 1
+                    return
+            self._async_changed.clear()
+            await self._async_changed.wait()
+
+    def _wake_async(self):
+        if self._async_changed is not None:
+            self._async_changed.set()
+
+
+# The limit the thread-based fetchers share; main() sets its maximum from --concurrency
+shared_limit = AdaptiveLimit()
+
+
+# Keep-alive sessions for the thread-based fetchers, one per pool size: every worker thread reuses the same pooled
+# connections (auth and data requests alike) instead of opening a new one per request. The pool holds as many
+# connections per host as the limit lets requests be in flight, so no worker waits on or discards a connection.
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def pooled_session(pool_size):
+    with _sessions_lock:
+        session = _sessions.get(pool_size)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[pool_size] = session
+    return session
+
+
+# session.request() under the adaptive limit, retrying transient failures. Returns the final response (callers
+# still call raise_for_status) or raises the last connection error/timeout. fetch_metrics["retries"] counts retries.
+# Without a session, the pooled session sized to the limit's maximum is used.
+def request_with_retry(method, url, limit=None, attempts=MAX_ATTEMPTS, fetch_metrics=None, session=None, **kwargs):
+    limit = limit or shared_limit
+    session = session or pooled_session(limit.maximum)
+    for attempt in range(attempts):
+        limit.acquire()
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            limit.release()
+            record_request(time.perf_counter() - start)
+            limit.record(congested=True)
+            if attempt == attempts - 1:
+                raise
+            retry_after = None
+        else:
+            latency = time.perf_counter() - start
+            limit.release()
+            record_request(latency)
+            if response.status_code not in RETRY_STATUSES:
+                limit.record(latency=latency)
+                return response
+            limit.record(congested=True)
+            if attempt == attempts - 1:
+                return response
+            retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+
+        if fetch_metrics is not None:
+            fetch_metrics["retries"] = fetch_metrics.get("retries", 0) + 1
+        time.sleep(backoff_delay(attempt, retry_after))
+
+
+# Print the customers whose data is missing from this run after every retry, and why
+def report_lost(lost, names=None):
+    names = names or {}
+    if not lost:
+        print("✅ No customers lost")
+        return
+    print(f"⚠️ {len(lost)} customer(s) lost after retries:")
+    for customer, reason in lost:
+        label = f"{names[customer]} ({customer})" if customer in names else customer
+        print(f"   - {label}: {reason}")
@@ -1,122 +1,121 @@
 import os
+import time
+import argparse
 import requests
-import json
 import pandas as pd
 from tqdm import tqdm
-from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
+from token_cache import get_auth_token, invalidate_token
+from roaming_decode import PayloadError, decode_payload
+from driver_ids import concat_coded
+from normalization import default_normalizer
+from account_store import AccountStore, day_bounds
+from run_metrics import stage, record_customer, failure_reason, lost_customers
+from fetch_scheduler import DEFAULT_MAX_CONCURRENCY, request_with_retry, report_lost, shared_limit
 
-# Get local system time (your computer's time zone)
-now_local = datetime.now()
-
-# Current date and time
-today_date = datetime.now().strftime("%Y-%m-%d")
-to_timestamp = int(now_local.timestamp() * 1000)
-
-# Get timestamp in milliseconds
-from_timestamp = int((now_local - timedelta(days=10)).timestamp() * 1000)
+# Days in the per-account view, assembled from the local per-account store
+WINDOW_DAYS = 10
 
 # Define your save directory
 output_dir = "Output/bad_drivers_per_acct"
-os.makedirs(output_dir, exist_ok=True)  # Ensure the directory exists
 
-# Driver vintage source file
-merged_roaming_analysis_file = "Output/merged_roaming_analysis_with_vintage.csv"
+# API URLs (set SEVENSIGNAL_API_BASE to point at another server, e.g. mock_7signal_api.py)
+API_BASE = os.environ.get("SEVENSIGNAL_API_BASE", "https://api-v2.7signal.com").rstrip("/")
+AUTH_URL = f'{API_BASE}/oauth2/token'
+
+# Adapter-driver KPIs between two epoch-millisecond timestamps
+def window_url(from_ms, to_ms):
+    return f"{API_BASE}/kpis/agents/adapter-drivers?from={from_ms}&to={to_ms}&type=ROAMING&includeClientCount=true"
 
-# API URLs
-ROAMING_URL = f"https://api-v2.7signal.com/kpis/agents/adapter-drivers?from={from_timestamp}&to={to_timestamp}&type=ROAMING&includeClientCount=true"
-AUTH_URL = 'https://api-v2.7signal.com/oauth2/token'
+# Adapter-driver KPIs for one calendar day
+def day_url(day):
+    return window_url(*day_bounds(day))
 
 # Excel file containing customer details
 EXCEL_PATH = "Customer_Data.xlsx"
 
-# Read customer credentials and account names
-customers_df = pd.read_excel(EXCEL_PATH)
-
-# Function to fetch authentication token
-def get_auth_token(client_id, client_secret):
-    auth_data = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "grant_type": "client_credentials"
-    }
-    auth_headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/x-www-form-urlencoded"
-    }
-    try:
-        response = requests.post(AUTH_URL, data=auth_data, headers=auth_headers, timeout=10)
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except requests.RequestException:
-        return None
-
-# Function to fetch and process data for a customer
-def fetch_customer_data(client_info):
+# Decode the API response body straight into a DataFrame tagged with the account (None when it has no rows)
+def parse_roaming_data(body, account_name):
+    return decode_payload(body, account_name)
+
+# Function to fetch and process data for a customer (timings and any failure go to the run's metrics).
+# Pulls every URL with one token; returns one frame per URL (None when the customer failed).
+def fetch_customer_data(client_info, urls):
     client_id, client_secret, account_name = client_info
-    token = get_auth_token(client_id, client_secret)
-    
-    if not token:
-        return None
-    
-    headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
-    
+    fetch_metrics = {"auth_seconds": None, "fetch_seconds": None, "payload_bytes": None, "rows": None, "retries": 0, "error": None}
+
     try:
-        response = requests.get(ROAMING_URL, headers=headers, timeout=30)
-        response.raise_for_status()
-        roaming_data = response.json().get('results', [])
+        start = time.perf_counter()
+        token = get_auth_token(AUTH_URL, client_id, client_secret)
+        fetch_metrics["auth_seconds"] = round(time.perf_counter() - start, 3)
+
+        if not token:
+            fetch_metrics["error"] = "authentication failed"
+            return None
 
-        if not roaming_data:
+        headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
+
+        try:
+            start = time.perf_counter()
+            frames = []
+            payload_bytes = 0
+            for url in urls:
+                response = request_with_retry("GET", url, headers=headers, timeout=30, fetch_metrics=fetch_metrics)
+
+                # A cached token can be revoked before it expires; get a fresh one and retry once
+                if response.status_code == 401:
+                    invalidate_token(client_id)
+                    token = get_auth_token(AUTH_URL, client_id, client_secret)
+                    if not token:
+                        fetch_metrics["error"] = "authentication failed after 401"
+                        return None
+                    headers["Authorization"] = f"Bearer {token}"
+                    response = request_with_retry("GET", url, headers=headers, timeout=30, fetch_metrics=fetch_metrics)
+
+                response.raise_for_status()
+                payload_bytes += len(response.content)
+                frames.append(parse_roaming_data(response.content, account_name))
+
+            fetch_metrics["fetch_seconds"] = round(time.perf_counter() - start, 3)
+            fetch_metrics["payload_bytes"] = payload_bytes
+            fetch_metrics["rows"] = sum(len(df) for df in frames if df is not None)
+            return frames
+
+        # A failed request or an undecodable body loses this customer only
+        except (requests.RequestException, PayloadError) as e:
+            fetch_metrics["error"] = failure_reason(e)
+            return None
+    finally:
+        record_customer(account_name, **fetch_metrics)
+
+# Pull only the days of the window this customer is missing from the store, then read the whole window back from it.
+# Returns the window's frame, or None when the pull failed or the window holds no data.
+def fetch_customer_window(store, client_info, days=WINDOW_DAYS):
+    client_id, _, account_name = client_info
+    missing = store.missing_days(client_id, days)
+    if missing:
+        frames = fetch_customer_data(client_info, [day_url(day) for day in missing])
+        if frames is None:
             return None
+        store.add_days(client_id, dict(zip(missing, frames)))
+    return store.window(client_id, account_name, days)
+
+# Sum per-customer frames per account and compute each driver's good roaming %
+def build_account_summary(data_frames):
+    master_df = concat_coded(data_frames)
+
 
-        
-        # Convert JSON to DataFrame efficiently
-        data = []
-        for entry in roaming_data:
-            adapter = entry.get('driverProvider', 'Unknown')  # Adapter column
-            driver = entry.get('driverVersion', 'Unknown')    # Driver column
-            adapter_driver = f"{adapter} - {driver}"          # Concatenated Adapter-Driver column
-            
-            for type_info in entry.get("types", []):
-                data.append({
-                    "Account Name": account_name,
-                    "Adapter": adapter,
-                    "Driver": driver,
-                    "Adapter-Driver": adapter_driver,
-                    "goodSum": type_info.get("goodSum", 0),
-                    "criticalSum": type_info.get("criticalSum", 0),
-                    "warningSum": type_info.get("warningSum", 0),
-                    "clientCount": entry.get("clientCount", 0)
-                })
-        return pd.DataFrame(data)
-
-    except requests.RequestException:
-        return None
-
-# **Use Multi-Threading to Fetch Data Faster**
-with ThreadPoolExecutor(max_workers=3) as executor:
-    results = list(tqdm(executor.map(fetch_customer_data, zip(customers_df['client_id'], customers_df['client_secret'], customers_df['account_name'])), 
-                        total=len(customers_df), desc="Fetching Data"))
-
-# Combine customer data into a single DataFrame
-data_frames = [df for df in results if df is not None]
-
-if data_frames:
-    master_df = pd.concat(data_frames, ignore_index=True)
-    
-    
     # Group and aggregate data
-    master_df = master_df.groupby(['Account Name', 'Adapter', 'Driver', 'Adapter-Driver'], as_index=False).agg({
+    master_df = master_df.groupby(['Account Name', 'Adapter', 'Driver', 'Adapter-Driver'], as_index=False, observed=True).agg({
         'goodSum': 'sum',
         'criticalSum': 'sum',
         'warningSum': 'sum',
         'clientCount': 'sum'
     })
 
-        
-    # Strip the first word and dash in 'Adapter' and 'Adapter-Driver'
-    master_df['Adapter'] = master_df['Adapter'].str.replace(r'^[^-]*-\s*', '', regex=True)
-    master_df['Adapter-Driver'] = master_df['Adapter-Driver'].str.replace(r'^[^-]*-\s*', '', regex=True)
+
+    # Strip the first word and dash in 'Adapter' and 'Adapter-Driver' ("vendor_prefix" rules, once per distinct value)
+    master_df = default_normalizer().apply("vendor_prefix", master_df)
 
     # Add totalSum column before calculating percentages
     master_df['totalSum'] = master_df[['goodSum', 'criticalSum', 'warningSum']].sum(axis=1)
@@ -127,33 +126,112 @@ if data_frames:
     # Compute "Good Roaming Calculation (%)"
     master_df['Good Roaming Calculation (%)'] = ((1 - (master_df['criticalSum'] / master_df['totalSum'])) * 100).fillna(100).round(1)
 
-
-    # Ensure "Good Roaming Calculation (%)" exists and is a float
-    if 'Good Roaming Calculation (%)' in master_df.columns:
-        master_df['Good Roaming Calculation (%)'] = master_df['Good Roaming Calculation (%)'].astype(float)
+    # Ensure "Good Roaming Calculation (%)" is a float
+    master_df['Good Roaming Calculation (%)'] = master_df['Good Roaming Calculation (%)'].astype(float)
 
     # Rename columns
-        master_df = master_df.rename(columns={'criticalSum': 'Critical Minutes', 'clientCount': 'Client Count', 'totalSum': 'Total Minutes'})
-
-        
-        # Function to ensure filenames are safe
-        def sanitize_filename(name):
-            return "".join(c if c.isalnum() or c in ('_', '-') else "_" for c in name)
-
-        # Identify poor roamers
-        poor_roamers = master_df[master_df['Good Roaming Calculation (%)'] < 99.0].sort_values(by="Good Roaming Calculation (%)", ascending=True)
-        
-        if not poor_roamers.empty:
-            poor_roamers.loc[:, 'Adapter'] = poor_roamers['Adapter'].str.strip().str.lower()
-
-            # Save separate reports for each account
-            for account_name in poor_roamers['Account Name'].unique():
-                account_data = poor_roamers[poor_roamers['Account Name'] == account_name]
-
-                # Create a sanitized filename with account name and date
-                sanitized_name = sanitize_filename(account_name)
-                account_csv_filename =  os.path.join(output_dir, f"bad_drivers_for_{sanitized_name}.csv")
-
-                # Save the filtered data to a CSV file
-                account_data.to_csv(account_csv_filename, index=False)
-                print(f"✅ Report saved: {account_csv_filename}")
+    return master_df.rename(columns={'criticalSum': 'Critical Minutes', 'clientCount': 'Client Count', 'totalSum': 'Total Minutes'})
+
+# Function to ensure filenames are safe
+def sanitize_filename(name):
+    return "".join(c if c.isalnum() or c in ('_', '-') else "_" for c in name)
+
+# Write one account's partition and report where it went
+def _write_partition(account_data, account_csv_filename):
+    account_data.to_csv(account_csv_filename, index=False)
+    return f"✅ Report saved: {account_csv_filename}"
+
+# Write the poor roamers of every account as one Parquet file, one row group per account,
+# so readers can pull a single account with filters=[('Account Name', '=', name)]
+def write_combined_report(partitions, combined_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tmp_path = f"{combined_path}.tmp"
+    writer = None
+    try:
+        for account_data in partitions:
+            table = pa.Table.from_pandas(account_data, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema, compression='zstd')
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is not None:
+        os.replace(tmp_path, combined_path)
+        print(f"✅ Combined report saved: {combined_path}")
+
+# Write one bad-driver CSV per account with poor roamers
+def write_bad_driver_reports(master_df, report_dir=output_dir, workers=8, combined_path=None):
+    os.makedirs(report_dir, exist_ok=True)  # Ensure the directory exists
+
+    # Identify poor roamers
+    poor_roamers = master_df[master_df['Good Roaming Calculation (%)'] < 99.0].sort_values(by="Good Roaming Calculation (%)", ascending=True)
+
+    if poor_roamers.empty:
+        return
+
+    poor_roamers = poor_roamers.assign(Adapter=default_normalizer().series("adapter_key", "Adapter", poor_roamers['Adapter']))
+
+    # Split by account in a single grouping pass (accounts in order of appearance)
+    partitions = {}
+    for account_name, account_data in poor_roamers.groupby('Account Name', sort=False):
+        # Create a sanitized filename with account name; a later account with the same sanitized name wins, as before
+        sanitized_name = sanitize_filename(account_name)
+        account_csv_filename = os.path.join(report_dir, f"bad_drivers_for_{sanitized_name}.csv")
+        partitions.pop(account_csv_filename, None)
+        partitions[account_csv_filename] = account_data
+
+    # Save every account's file in parallel
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for message in executor.map(_write_partition, partitions.values(), partitions.keys()):
+            print(message)
+
+    if combined_path:
+        write_combined_report(partitions.values(), combined_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch the days each customer is missing and write a bad driver CSV per account over the last N days.")
+    parser.add_argument("--days", type=int, default=WINDOW_DAYS, help="Days in each account's view (complete days, ending yesterday)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Most requests in flight at once; the fetcher adapts below it to latency and throttling")
+    parser.add_argument("--write-workers", type=int, default=8, help="Account CSVs written in parallel")
+    parser.add_argument("--combined", default=None,
+                        help="Also write every account's poor roamers to this single Parquet file (one row group per account)")
+    args = parser.parse_args()
+
+    # Read customer credentials and account names
+    customers_df = pd.read_excel(EXCEL_PATH)
+
+    store = AccountStore()
+    clients = list(zip(customers_df['client_id'], customers_df['client_secret'], customers_df['account_name']))
+
+    with stage("fetch", rows_in=len(customers_df)) as fetch_stage:
+        fetch_stage["days_fetched"] = sum(len(store.missing_days(client_id, args.days)) for client_id, _, _ in clients)
+
+        # **Use Multi-Threading to Fetch Data Faster** (requests in flight follow the adaptive limit)
+        shared_limit.reset(maximum=args.concurrency)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(tqdm(executor.map(lambda client_info: fetch_customer_window(store, client_info, args.days), clients),
+                                total=len(clients), desc="Fetching Data"))
+        store.save()
+
+        # Combine customer data into a single DataFrame
+        data_frames = [df for df in results if df is not None]
+        fetch_stage["rows_out"] = sum(len(df) for df in data_frames)
+
+    report_lost(lost_customers())
+
+    if data_frames:
+        with stage("account summary", rows_in=fetch_stage["rows_out"]) as summary_stage:
+            master_df = build_account_summary(data_frames)
+            summary_stage["rows_out"] = len(master_df)
+        with stage("write reports", rows_in=len(master_df)):
+            write_bad_driver_reports(master_df, workers=args.write_workers, combined_path=args.combined)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,232 +1,196 @@
 import os
+import argparse
 import pandas as pd
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl import load_workbook
-from openpyxl.styles import Font, numbers, Alignment, Border, Side
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
+from driver_index import DriverIndex, GOOD_THRESHOLD
+from run_metrics import stage
+from normalization import default_normalizer
 
 # Paths
 account_history_dir = "Output/bad_drivers_per_acct"
-merged_file_path = "Output/merged_roaming_analysis_with_vintage.csv"
 output_dir = "Output/roaming_impact_reports_per_acct"
 
-# Ensure output directory exists
-os.makedirs(output_dir, exist_ok=True)
-
-# Load merged analysis
-merged_df = pd.read_csv(merged_file_path)
-merged_df.columns = [col.strip().lower() for col in merged_df.columns]
-merged_df['adapter'] = merged_df['adapter'].str.strip().str.lower()
-
-# Ensure good roaming is numeric
 roam_col = 'good roaming calculation (%)'
-merged_df[roam_col] = pd.to_numeric(merged_df[roam_col], errors='coerce')
-
-# Loop through account bad driver files
-for filename in os.listdir(account_history_dir):
-    if filename.startswith("bad_drivers") and filename.endswith(".csv"):
-        account_name = filename.replace("bad_drivers_for_", "").replace(".csv", "")
-        file_path = os.path.join(account_history_dir, filename)
-
-        bad_df = pd.read_csv(file_path)
-        bad_df.columns = [col.strip().lower() for col in bad_df.columns]
-
-        if 'adapter' not in bad_df.columns:
-            print(f"[{account_name}] No 'adapter' column. Skipping.")
-            continue
-
-        bad_df['adapter'] = bad_df['adapter'].str.strip().str.lower()
-        bad_adapters = bad_df['adapter'].unique()
-
-        matched_df = merged_df[merged_df['adapter'].isin(bad_adapters)]
-        good_df = matched_df[matched_df[roam_col] > 99.5]
-
-        output_file = os.path.join(output_dir, f"{account_name}_driver_summary.xlsx")
-
-        # Write initial content to Excel
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            workbook = writer.book
-            if 'Sheet' in workbook.sheetnames:
-                workbook.remove(workbook['Sheet'])
-
-            ws = workbook.create_sheet(title='Driver Summary')
-
-            # === WRITE RAW BAD DRIVERS SECTION ===
-            ws.append(["Bad Drivers"])
-            ws["A" + str(ws.max_row)].font = Font(bold=True)
-
-            bad_driver_start = ws.max_row + 1
-
-            if not bad_df.empty:
-                for row in dataframe_to_rows(bad_df, index=False, header=True):
-                    ws.append(row)
-            else:
-                ws.append(["No bad drivers found."])
-
-        # Reopen to clean and format
-        wb = load_workbook(output_file)
-        ws = wb.active
-
-        # === CLEAN & REWRITE BAD DRIVERS SECTION ===
-        start_row = None
-        for i, row in enumerate(ws.iter_rows(min_row=1, max_col=10), start=1):
-            if row[0].value == "Bad Drivers":
-                start_row = i + 1
-                break
-
-        if start_row is not None:
-            header_row = [cell.value for cell in next(ws.iter_rows(min_row=start_row, max_row=start_row))]
-            rows_to_keep = []
-            for r in ws.iter_rows(min_row=start_row + 1, max_col=10, values_only=True):
-                if all(v is None for v in r):
-                    break
-                data = dict(zip(header_row, r))
-                rows_to_keep.append([
-                    data.get('adapter-driver'),
-                    data.get('client count'),
-                    data.get('critical minutes'),
-                    data.get('good roaming calculation (%)')
-                ])
-
-            rows_to_clear = len(rows_to_keep) + 5
-            for row in ws.iter_rows(min_row=start_row, max_row=start_row + rows_to_clear):
-                for cell in row:
-                    cell.value = None
-
-            cleaned_headers = ['Adapter-Driver', 'Client Count', 'Critical Minutes', 'Good Roaming Calculation (%)']
-            for col, header in enumerate(cleaned_headers, start=1):
-                ws.cell(row=start_row, column=col, value=header)
-
-            # Underline the Bad Drivers header row
-            thin_border = Border(bottom=Side(style='thin'))
-            for col in range(1, len(cleaned_headers) + 1):
-                ws.cell(row=start_row, column=col).border = thin_border
-
-            for i, row_data in enumerate(rows_to_keep):
-                for j, value in enumerate(row_data, start=1):
-                    ws.cell(row=start_row + 1 + i, column=j, value=value)
-
-            total_row_index = start_row + 1 + len(rows_to_keep)
-            ws.cell(row=total_row_index, column=1, value="Totals:")
-            ws.cell(row=total_row_index, column=2, value=sum(val[1] for val in rows_to_keep if isinstance(val[1], (int, float))))
-            ws.cell(row=total_row_index, column=3, value=sum(val[2] for val in rows_to_keep if isinstance(val[2], (int, float))))
-            ws.cell(row=total_row_index, column=1).font = Font(bold=True)
-            ws.cell(row=total_row_index, column=2).font = Font(bold=True)
-            ws.cell(row=total_row_index, column=3).font = Font(bold=True)
-
-            # Left-align all cells in column B
-            for row in ws.iter_rows(min_row=start_row, max_row=start_row + len(rows_to_keep), min_col=2, max_col=2):
-                for cell in row:
-                    cell.alignment = Alignment(horizontal='right')
-
-            # Left-align all cells in column C
-            for row in ws.iter_rows(min_row=start_row, max_row=start_row + len(rows_to_keep), min_col=3, max_col=3):
-                for cell in row:
-                    cell.alignment = Alignment(horizontal='right')
-
-
-            # Left-align all cells in column D
-            for row in ws.iter_rows(min_row=start_row, max_row=start_row + len(rows_to_keep), min_col=4, max_col=4):
-                for cell in row:
-                    cell.alignment = Alignment(horizontal='right')
-
-            for col in [2, 3]:
-                cell = ws.cell(row=total_row_index, column=col)
-                if isinstance(cell.value, (int, float)):
-                    cell.number_format = '#,##0'
-
-            ws.append([])
-            
-
-        # === WRITE GOOD DRIVERS SECTION ===
-        ws.append(["Good Drivers (Roaming > 99.8%)"])
-        ws["A" + str(ws.max_row)].font = Font(bold=True)
-
-        if not good_df.empty:
-            for row in dataframe_to_rows(good_df, index=False, header=True):
-                ws.append(row)
+
+BAD_HEADERS = ['Adapter-Driver', 'Client Count', 'Critical Minutes', 'Good Roaming Calculation (%)']
+GOOD_HEADERS = ['Adapter-Driver', 'Total Samples', '', 'Good Roaming Calculation (%)', 'Driver Vintage']
+
+BOLD = Font(bold=True)
+RIGHT = Alignment(horizontal='right')
+UNDERLINE = Border(bottom=Side(style='thin'))
+
+
+# Plain Python values for openpyxl (no numpy scalars, NaN becomes an empty cell)
+def _cell_value(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+        if isinstance(value, float) and value != value:
+            return None
+    return value
+
+
+# Rows of the "Bad Drivers" section plus its totals row
+def bad_section_rows(bad_df):
+    if bad_df.empty:
+        return [], None
+
+    rows = [
+        [_cell_value(row.get('adapter-driver')), _cell_value(row.get('client count')),
+         _cell_value(row.get('critical minutes')), _cell_value(row.get(roam_col))]
+        for row in bad_df.to_dict('records')
+    ]
+    totals = [
+        "Totals:",
+        sum(val[1] for val in rows if isinstance(val[1], (int, float))),
+        sum(val[2] for val in rows if isinstance(val[2], (int, float)))
+    ]
+    return rows, totals
+
+
+# Rows of the "Good Drivers" section (DriverIndex entries), newest driver vintage first, higher version first on the same day
+def good_section_rows(good_drivers):
+    good_drivers = sorted(good_drivers, key=lambda e: e.version or (), reverse=True)
+    good_drivers.sort(key=lambda e: str(e.vintage) if e.vintage is not None else '', reverse=True)
+    return [
+        [_cell_value(entry.adapter_driver), _cell_value(entry.total_sum), '',
+         _cell_value(entry.good_pct), _cell_value(entry.vintage)]
+        for entry in good_drivers
+    ]
+
+
+def _styled(ws, value, font=None, border=None, alignment=None, number_format=None):
+    cell = WriteOnlyCell(ws, value=value)
+    if font:
+        cell.font = font
+    if border:
+        cell.border = border
+    if alignment:
+        cell.alignment = alignment
+    if number_format and isinstance(value, (int, float)):
+        cell.number_format = number_format
+    return cell
+
+
+# Compute every row first, size the columns from the values, then stream the workbook out once
+def write_report(output_file, bad_df, good_drivers):
+    bad_rows, bad_totals = bad_section_rows(bad_df)
+    good_rows = good_section_rows(good_drivers)
+    good_title = f"Good Drivers (Roaming > {GOOD_THRESHOLD}%)"
+
+    # Column widths: longest value in each column + 2, as the old auto-size pass did
+    all_rows = [["Bad Drivers"], BAD_HEADERS, *bad_rows, [good_title], GOOD_HEADERS, *good_rows]
+    if bad_totals:
+        all_rows.append(bad_totals)
+    widths = {}
+    for row in all_rows:
+        for col, value in enumerate(row, start=1):
+            if value:
+                widths[col] = max(widths.get(col, 0), len(str(value)))
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title='Driver Summary')
+    for col, width in widths.items():
+        ws.column_dimensions[get_column_letter(col)].width = width + 2
+
+    # === BAD DRIVERS SECTION ===
+    ws.append([_styled(ws, "Bad Drivers", font=BOLD)])
+    if bad_rows:
+        ws.append([_styled(ws, header, border=UNDERLINE, alignment=RIGHT if col > 1 else None)
+                   for col, header in enumerate(BAD_HEADERS, start=1)])
+        for row in bad_rows:
+            ws.append([_styled(ws, value, alignment=RIGHT if col > 1 else None) for col, value in enumerate(row, start=1)])
+        ws.append([_styled(ws, value, font=BOLD, number_format='#,##0' if col > 1 else None)
+                   for col, value in enumerate(bad_totals, start=1)])
+    else:
+        ws.append(["No bad drivers found."])
+
+    ws.append([])
+
+    # === GOOD DRIVERS SECTION ===
+    ws.append([_styled(ws, good_title, font=BOLD)])
+    if good_rows:
+        ws.append([_styled(ws, header, border=UNDERLINE, alignment=RIGHT if col in (2, 4, 5) else None)
+                   for col, header in enumerate(GOOD_HEADERS, start=1)])
+        for row in good_rows:
+            ws.append([_styled(ws, value,
+                               alignment=RIGHT if col in (2, 4, 5) else None,
+                               number_format='#,##0' if col in (2, 3) else None)
+                       for col, value in enumerate(row, start=1)])
+    else:
+        ws.append(["No good drivers found."])
+
+    wb.save(output_file)
+
+
+_driver_index = None
+
+
+def _init_worker(driver_index):
+    global _driver_index
+    _driver_index = driver_index
+
+
+# Build one account's report from its bad driver CSV (runs in a worker process)
+def render_account_report(filename):
+    account_name = filename.replace("bad_drivers_for_", "").replace(".csv", "")
+    file_path = os.path.join(account_history_dir, filename)
+
+    bad_df = pd.read_csv(file_path)
+    bad_df.columns = [col.strip().lower() for col in bad_df.columns]
+
+    if 'adapter' not in bad_df.columns:
+        return f"[{account_name}] No 'adapter' column. Skipping."
+
+    bad_df['adapter'] = default_normalizer().series("adapter_key", "Adapter", bad_df['adapter'])
+
+    # Good replacements for this account's adapters come straight from the prebuilt index
+    good_drivers = _driver_index.recommendations(bad_df['adapter'].dropna(), GOOD_THRESHOLD)
+
+    output_file = os.path.join(output_dir, f"{account_name}_driver_summary.xlsx")
+    write_report(output_file, bad_df, good_drivers)
+    return f"✅ {account_name} report generated and formatted."
+
+
+# Print each account's result as it comes in; returns how many reports were written
+def print_results(messages):
+    written = 0
+    for message in messages:
+        print(message)
+        written += message.startswith("✅")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a bad/good driver Excel report for every account.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Accounts rendered in parallel")
+    args = parser.parse_args()
+
+    # Ensure output directory exists
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Index the merged analysis once: adapter -> drivers, best first
+    with stage("driver index") as index_stage:
+        driver_index = DriverIndex.from_csv()
+        index_stage["rows_out"] = len(driver_index)
+
+    # Loop through account bad driver files
+    filenames = sorted(f for f in os.listdir(account_history_dir) if f.startswith("bad_drivers") and f.endswith(".csv"))
+
+    with stage("reports", rows_in=len(filenames)) as reports_stage:
+        if args.workers <= 1:
+            _init_worker(driver_index)
+            reports_stage["rows_out"] = print_results(map(render_account_report, filenames))
         else:
-            ws.append(["No good drivers found."])
-
-        # === FORMAT GOOD DRIVERS SECTION ===
-        start_row = None
-        for i, row in enumerate(ws.iter_rows(min_row=1, max_col=10), start=1):
-            if row[0].value == "Good Drivers (Roaming > 99.5%)":
-                start_row = i + 1
-                break
-
-        if start_row is not None:
-            header_row = [cell.value for cell in next(ws.iter_rows(min_row=start_row, max_row=start_row))]
-            rows_to_keep = []
-            for r in ws.iter_rows(min_row=start_row + 1, max_col=10, values_only=True):
-                if all(v is None for v in r):
-                    break
-                data = dict(zip(header_row, r))
-                rows_to_keep.append([
-                    data.get('adapter-driver'),
-                    data.get('total sum'),
-                    '',
-                    data.get('good roaming calculation (%)'),
-                    data.get('driver vintage')
-                ])
-
-            for row in ws.iter_rows(min_row=start_row, max_row=start_row + len(rows_to_keep) + 5):
-                for cell in row:
-                    cell.value = None
-
-            new_headers = ['Adapter-Driver', 'Total Samples', '', 'Good Roaming Calculation (%)', 'Driver Vintage']
-            for col, header in enumerate(new_headers, start=1):
-                ws.cell(row=start_row, column=col, value=header)
-
-            
-            driver_vintage_column = new_headers.index("Driver Vintage") + 1
-            rows_to_keep.sort(
-                key=lambda row: str(row[driver_vintage_column - 1]) if row[driver_vintage_column - 1] is not None else '',
-                reverse=True
-            )
-            for i, row_data in enumerate(rows_to_keep, start=start_row + 1):
-                for j, value in enumerate(row_data, start=1):
-                    ws.cell(row=i, column=j, value=value)
-
-            # Underline the Good Drivers header row
-            thin_border = Border(bottom=Side(style='thin'))
-            for col in range(1, len(new_headers) + 1):
-                ws.cell(row=start_row, column=col).border = thin_border
-
-            # Left-align all cells in column B
-            for row in ws.iter_rows(min_row=start_row, max_row=start_row + len(rows_to_keep), min_col=2, max_col=2):
-                for cell in row:
-                    cell.alignment = Alignment(horizontal='right')
-
-
-            # Left-align all cells in column D
-            for row in ws.iter_rows(min_row=start_row, max_row=start_row + len(rows_to_keep), min_col=4, max_col=4):
-                for cell in row:
-                    cell.alignment = Alignment(horizontal='right')
-
-
-            # Left-align all cells in column E
-            for row in ws.iter_rows(min_row=start_row, max_row=start_row + len(rows_to_keep), min_col=5, max_col=5):
-                for cell in row:
-                    cell.alignment = Alignment(horizontal='right')
-
-            for row in ws.iter_rows(min_row=start_row + 1, max_row=start_row + len(rows_to_keep), min_col=2, max_col=3):
-                for cell in row:
-                    if isinstance(cell.value, (int, float)):
-                        cell.number_format = '#,##0'
-
-        # === AUTO-SIZE COLUMNS ===
-        for column_cells in ws.columns:
-            max_length = 0
-            column = column_cells[0].column
-            column_letter = get_column_letter(column)
-            for cell in column_cells:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-            ws.column_dimensions[column_letter].width = max_length + 2
-
-        wb.save(output_file)
-        print(f"✅ {account_name} report generated and formatted.")
+            # The pool is shut down even when a report fails
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(driver_index,)) as pool:
+                reports_stage["rows_out"] = print_results(pool.map(render_account_report, filenames, chunksize=8))
+
+
+if __name__ == "__main__":
+    main()
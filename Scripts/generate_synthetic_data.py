@@ -0,0 +1,180 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from history_store import write_day
+from find_bad_drivers_per_acct import sanitize_filename
+
+# Repeatable stand-in for the real inputs: History days, the vintage/merged analysis files and
+# per-account bad driver CSVs, laid out like the repo (History/, Output/) under a chosen directory.
+# Scale is customers x adapter-drivers x days.
+MANUFACTURERS = {
+    "Intel(R)": ["Wi-Fi 6E AX211 160MHz", "Wi-Fi 6 AX201 160MHz", "Wi-Fi 7 BE200 320MHz", "Wireless-AC 9560 160MHz", "Dual Band Wireless-AC 8265"],
+    "Realtek": ["RTL8852BE WiFi 6 802.11ax PCIe Adapter", "RTL8822CE 802.11ac PCIe Adapter", "8821CE Wireless LAN 802.11ac PCI-E NIC"],
+    "MediaTek": ["Wi-Fi 6 MT7921 Wireless LAN Card", "Wi-Fi 6E MT7922 160MHz Wireless LAN Card"],
+    "Qualcomm": ["FastConnect 6900 Wi-Fi 6E Dual Band Simultaneous (DBS) WiFiCx Network Adapter", "QCA61x4A 802.11ac Wireless Adapter"],
+    "Broadcom": ["802.11ac Network Adapter", "BCM4360 802.11ac Wireless Network Adapter"],
+}
+
+# Critical/warning shares of a sample; most drivers roam well, a tail roams badly
+GOOD_DRIVER_CRITICAL_SHARE = (0.0, 0.006)
+BAD_DRIVER_CRITICAL_SHARE = (0.01, 0.4)
+BAD_DRIVER_FRACTION = 0.2
+
+
+# One row per Adapter-Driver with its roaming quality and release date
+def make_catalog(adapter_drivers, rng):
+    models = [f"{maker} {model}" for maker, names in MANUFACTURERS.items() for model in names]
+    adapters = [models[i % len(models)] + (f" #{i // len(models)}" if i >= len(models) else "")
+                for i in range(max(1, adapter_drivers // 6))]
+
+    adapter = rng.choice(adapters, adapter_drivers)
+    major = rng.integers(20, 25, adapter_drivers)
+    driver = [f"{m}.{rng.integers(0, 200)}.{rng.integers(0, 10)}.{i}" for i, m in enumerate(major)]
+
+    bad = rng.random(adapter_drivers) < BAD_DRIVER_FRACTION
+    critical_share = np.where(bad, rng.uniform(*BAD_DRIVER_CRITICAL_SHARE, adapter_drivers),
+                              rng.uniform(*GOOD_DRIVER_CRITICAL_SHARE, adapter_drivers))
+    released = [date(2020, 1, 1) + timedelta(days=int(d)) for d in rng.integers(0, 5 * 365, adapter_drivers)]
+
+    catalog = pd.DataFrame({"Adapter": adapter, "Driver": driver})
+    catalog["Adapter-Driver"] = catalog["Adapter"] + " - " + catalog["Driver"]
+    catalog["critical_share"] = critical_share
+    catalog["Driver Vintage"] = [f"{d.month}/{d.day}/{d.year}" for d in released]
+    return catalog
+
+
+# Samples, critical, warning and client counts for a set of catalog rows
+def draw_sums(critical_share, clients, rng):
+    total = rng.poisson(clients * 300) + clients
+    critical = rng.binomial(total, critical_share)
+    warning = rng.binomial(total - critical, 0.02)
+    return total - critical - warning, critical, warning, total
+
+
+# History and per-account formula: everything that isn't critical counts as good
+def with_percent(df):
+    df["Good Roaming Calculation (%)"] = ((1 - df["Critical Sum"] / df["Total Sum"]) * 100).fillna(100).round(1)
+    return df
+
+
+# Every customer runs a random slice of the catalog; returns {account: catalog row numbers}
+def make_fleets(customers, catalog, rng):
+    fleet_size = max(1, min(len(catalog), 40))
+    return {f"Customer {i:04d}": rng.choice(len(catalog), fleet_size, replace=False) for i in range(customers)}
+
+
+def write_history(catalog, fleets, days, out_dir, history_format, rng, end=None):
+    history_dir = os.path.join(out_dir, "History")
+    os.makedirs(history_dir, exist_ok=True)
+    end = end or date.today()
+
+    # Clients per Adapter-Driver across all customers running it
+    owners = np.zeros(len(catalog), dtype=np.int64)
+    for rows in fleets.values():
+        owners[rows] += 1
+    seen = np.flatnonzero(owners)
+
+    totals = np.zeros((len(catalog), 4), dtype=np.int64)
+    for offset in range(days):
+        day = (end - timedelta(days=days - offset)).isoformat()
+        clients = rng.poisson(owners[seen] * 3) + 1
+        good, critical, warning, total = draw_sums(catalog["critical_share"].to_numpy()[seen], clients, rng)
+        totals[seen] += np.column_stack([good, critical, warning, clients])
+
+        day_df = with_percent(pd.DataFrame({
+            "Adapter": catalog["Adapter"].to_numpy()[seen],
+            "Driver": catalog["Driver"].to_numpy()[seen],
+            "Adapter-Driver": catalog["Adapter-Driver"].to_numpy()[seen],
+            "Good Sum": good, "Critical Sum": critical, "Warning Sum": warning,
+            "Client Count": clients, "Total Sum": total,
+        }))
+        if history_format == "parquet":
+            write_day(day_df, day, os.path.join(history_dir, "parquet"))
+        else:
+            day_df["Good Roaming Calculation (%)"] = day_df["Good Roaming Calculation (%)"].map(lambda x: f"{x}%")
+            day_df.to_csv(os.path.join(history_dir, f"roaming_data_{day}.csv"), index=False)
+
+    return totals
+
+
+# aggregated_roaming_data_with_vintage.csv (merge input) and merged_roaming_analysis_with_vintage.csv
+def write_analysis(catalog, totals, out_dir):
+    output_dir = os.path.join(out_dir, "Output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    analysis = catalog[["Adapter-Driver"]].copy()
+    analysis["Good Sum"], analysis["Critical Sum"], analysis["Warning Sum"], analysis["Client Count"] = totals.T
+    analysis["Total Sum"] = totals[:, :3].sum(axis=1)
+    analysis["Adapter"] = catalog["Adapter"]
+    analysis["Driver"] = catalog["Driver"]
+    analysis = analysis[analysis["Total Sum"] > 0].copy()
+
+    # aggregate_roaming_data.py's formula: good samples over all samples
+    analysis["Good Roaming Calculation (%)"] = (analysis["Good Sum"] / analysis["Total Sum"] * 100).round(1)
+    analysis["Driver Vintage"] = catalog["Driver Vintage"]
+
+    analysis.to_csv(os.path.join(output_dir, "aggregated_roaming_data_with_vintage.csv"), index=False)
+
+    merged = analysis.copy()
+    merged["Driver Vintage"] = pd.to_datetime(merged["Driver Vintage"], format="%m/%d/%Y").dt.strftime("%Y-%m-%d")
+    merged.to_csv(os.path.join(output_dir, "merged_roaming_analysis_with_vintage.csv"), index=False)
+    return len(merged)
+
+
+# One bad driver CSV per account over a 10-day window, in find_bad_drivers_per_acct.py's format
+def write_bad_drivers(catalog, fleets, out_dir, rng):
+    report_dir = os.path.join(out_dir, "Output", "bad_drivers_per_acct")
+    os.makedirs(report_dir, exist_ok=True)
+
+    files = 0
+    for account_name, rows in fleets.items():
+        clients = rng.poisson(10, len(rows)) + 1
+        _, critical, _, total = draw_sums(catalog["critical_share"].to_numpy()[rows], clients * 10, rng)
+        account_df = with_percent(pd.DataFrame({
+            "Account Name": account_name,
+            "Adapter": catalog["Adapter"].to_numpy()[rows],
+            "Driver": catalog["Driver"].to_numpy()[rows],
+            "Adapter-Driver": catalog["Adapter-Driver"].to_numpy()[rows],
+            "Critical Sum": critical, "Client Count": clients, "Total Sum": total,
+        }))
+        poor = account_df[account_df["Good Roaming Calculation (%)"] < 99.0].sort_values("Good Roaming Calculation (%)")
+        if poor.empty:
+            continue
+
+        poor = poor.rename(columns={"Critical Sum": "Critical Minutes", "Total Sum": "Total Minutes"})
+        poor["Adapter"] = poor["Adapter"].str.lower()
+        poor.to_csv(os.path.join(report_dir, f"bad_drivers_for_{sanitize_filename(account_name)}.csv"), index=False)
+        files += 1
+    return files
+
+
+def generate(out_dir, customers, adapter_drivers, days, history_format="parquet", seed=7):
+    rng = np.random.default_rng(seed)
+    catalog = make_catalog(adapter_drivers, rng)
+    fleets = make_fleets(customers, catalog, rng)
+
+    totals = write_history(catalog, fleets, days, out_dir, history_format, rng)
+    merged_rows = write_analysis(catalog, totals, out_dir)
+    bad_files = write_bad_drivers(catalog, fleets, out_dir, rng)
+    return {"history_days": days, "merged_rows": merged_rows, "bad_driver_files": bad_files}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic History, analysis and bad driver files.")
+    parser.add_argument("--out", required=True, help="Directory to create History/ and Output/ in")
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--adapter-drivers", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--history-format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    summary = generate(args.out, args.customers, args.adapter_drivers, args.days, args.history_format, args.seed)
+    print(f"✅ Synthetic data written to {args.out}: {summary['history_days']} History day(s), "
+          f"{summary['merged_rows']:,} merged rows, {summary['bad_driver_files']} bad driver file(s)")
+
+
+if __name__ == "__main__":
+    main()
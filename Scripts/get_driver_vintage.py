@@ -1,55 +1,123 @@
+import os
 import time
 import random
 import tempfile
+import argparse
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from datetime import date, datetime
+from run_metrics import stage
 
 # Load CSV file
 input_file_path = "Output/aggregated_roaming_data.csv"
 output_file_path = "Output/aggregated_roaming_data_with_vintage.csv"
 
-df = pd.read_csv(input_file_path)
-
-# Check if 'Adapter-Driver' column exists
-if "Adapter-Driver" not in df.columns:
-    print("❌ Error: 'Adapter-Driver' column not found in CSV.")
-    exit()
-
-# Set up Selenium WebDriver options
-options = webdriver.ChromeOptions()
-options.add_argument("--headless=chrome")  # GitHub Actions-safe headless mode
-options.add_argument("--disable-blink-features=AutomationControlled")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-extensions")
-options.add_argument("--disable-gpu")  # Optional, helps headless in some CI cases
-options.add_argument(f"--user-data-dir={tempfile.mkdtemp()}")  # Unique profile
-options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-
-# Install and launch WebDriver
-chrome_driver_path = ChromeDriverManager().install()
-service = Service(chrome_driver_path)
-driver = webdriver.Chrome(service=service, options=options)
-
-# Open Microsoft Catalog
-driver.get("https://www.catalog.update.microsoft.com/Home.aspx")
-
-# Wait for page to load
-WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-print("✅ Page fully loaded.")
-
-# Create a new column for Driver Vintage
-df["Driver Vintage"] = "Not Found"
-
-# Loop through each row in the CSV
-for index, row in df.iterrows():
-    adapter = row["Adapter-Driver"]
+# Adapter-Driver -> vintage lookups from earlier runs (a driver's release date never changes)
+cache_file_path = "Output/driver_vintage_cache.csv"
+
+NOT_FOUND = "Not Found"
+
+# Element the catalog shows instead of a results table when a search has no results
+NO_RESULTS_ID = "ctl00_catalogBody_noResultText"
+
+# "Not Found" results are retried once they are this old; found dates are kept forever
+NOT_FOUND_TTL_DAYS = 90
+
+
+# A missing (NaN) or empty Adapter-Driver can't be searched for and is never cached
+def is_missing(adapter):
+    return adapter is None or (not isinstance(adapter, str) and pd.isna(adapter)) or adapter == ""
+
+
+# {Adapter-Driver: (Driver Vintage, date last checked)}
+def load_vintage_cache(path=cache_file_path):
+    if os.path.exists(path):
+        cache_df = pd.read_csv(path, dtype=str).fillna("")
+        return {row["Adapter-Driver"]: (row["Driver Vintage"], row["Checked"]) for _, row in cache_df.iterrows()
+                if row["Adapter-Driver"]}
+
+    # First run: seed from the last vintage output so nothing already known is searched again
+    cache = {}
+    if os.path.exists(output_file_path):
+        today = date.today().isoformat()
+        previous_df = pd.read_csv(output_file_path, dtype=str)
+        if {"Adapter-Driver", "Driver Vintage"} <= set(previous_df.columns):
+            for adapter, vintage in zip(previous_df["Adapter-Driver"], previous_df["Driver Vintage"].fillna(NOT_FOUND)):
+                if not is_missing(adapter):
+                    cache[adapter] = (vintage, today)
+    return cache
+
+
+def save_vintage_cache(cache, path=cache_file_path):
+    cache_df = pd.DataFrame(
+        sorted((str(adapter), vintage, checked) for adapter, (vintage, checked) in cache.items() if not is_missing(adapter)),
+        columns=["Adapter-Driver", "Driver Vintage", "Checked"]
+    )
+    cache_df.to_csv(path, index=False)
+
+
+# Keys never looked up, plus "Not Found" entries older than the TTL
+def keys_to_look_up(adapter_drivers, cache, not_found_ttl_days=NOT_FOUND_TTL_DAYS):
+    today = date.today()
+    pending = []
+    for adapter in dict.fromkeys(adapter_drivers):
+        if is_missing(adapter):
+            continue
+        if adapter not in cache:
+            pending.append(adapter)
+            continue
+
+        vintage, checked = cache[adapter]
+        if vintage == NOT_FOUND:
+            try:
+                age_days = (today - datetime.strptime(checked, "%Y-%m-%d").date()).days
+            except ValueError:
+                age_days = not_found_ttl_days
+            if age_days >= not_found_ttl_days:
+                pending.append(adapter)
+    return pending
+
+
+def start_browser():
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    # Set up Selenium WebDriver options
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=chrome")  # GitHub Actions-safe headless mode
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-gpu")  # Optional, helps headless in some CI cases
+    options.add_argument(f"--user-data-dir={tempfile.mkdtemp()}")  # Unique profile
+    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+    # Install and launch WebDriver
+    chrome_driver_path = ChromeDriverManager().install()
+    service = Service(chrome_driver_path)
+    driver = webdriver.Chrome(service=service, options=options)
+
+    # Open Microsoft Catalog
+    driver.get("https://www.catalog.update.microsoft.com/Home.aspx")
+
+    # Wait for page to load
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    print("✅ Page fully loaded.")
+    return driver
+
+
+# Search the catalog for one Adapter-Driver and return the first result's "Last Updated" date, NOT_FOUND when the
+# catalog says it has no results, or None when the search failed (browser error, timeout, page that didn't load)
+def lookup_vintage(driver, adapter):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     print(f"\n🔍 Searching for: {adapter}")
 
     try:
@@ -73,23 +141,97 @@ for index, row in df.iterrows():
         )
         last_updated = last_updated_cell.text.strip()
         print(f"✅ {adapter} - Last Updated: {last_updated}")
-
-        # Store in DataFrame
-        df.at[index, "Driver Vintage"] = last_updated
+        return last_updated
 
     except Exception as e:
-        print(f"❌ Error processing '{adapter}': Not Found")
-        print("🔍 Current page source (truncated):")
-        print(driver.page_source[:1000])
-        df.at[index, "Driver Vintage"] = "Not Found"
-
-    
-    # Minimum delay between requests
-    time.sleep(random.uniform(1.2, 2.5))
-
-# Close WebDriver
-driver.quit()
-
-# Save the updated DataFrame to CSV
-df.to_csv(output_file_path, index=False)
-print(f"\n✅ File saved: {output_file_path}")
+        try:
+            if driver.find_elements(By.ID, NO_RESULTS_ID):
+                print(f"❌ {adapter} - Not Found")
+                return NOT_FOUND
+            print("🔍 Current page source (truncated):")
+            print(driver.page_source[:1000])
+        except Exception:
+            pass
+        print(f"❌ Error processing '{adapter}': {type(e).__name__}, will retry next run")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add a 'Driver Vintage' column using the Microsoft Update Catalog.")
+    parser.add_argument("--not-found-ttl-days", type=int, default=NOT_FOUND_TTL_DAYS,
+                        help="Retry 'Not Found' lookups once they are this many days old")
+    parser.add_argument("--backend", choices=["selenium", "http"], default="selenium",
+                        help="selenium: headless Chrome, one lookup at a time (default); http: plain HTTP search requests in parallel")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel lookups for the http backend")
+    parser.add_argument("--rate", type=float, default=2.0, help="Maximum catalog requests per second for the http backend")
+    parser.add_argument("--catalog-url", default=None,
+                        help="Search page for the http backend (e.g. a locally served Samples/catalog_search_sample.html)")
+    args = parser.parse_args()
+
+    df = pd.read_csv(input_file_path)
+
+    # Check if 'Adapter-Driver' column exists
+    if "Adapter-Driver" not in df.columns:
+        print("❌ Error: 'Adapter-Driver' column not found in CSV.")
+        exit()
+
+    cache = load_vintage_cache()
+    pending = keys_to_look_up(df["Adapter-Driver"], cache, args.not_found_ttl_days)
+    print(f"🗂️ {len(df) - len(pending)} driver(s) served from cache, {len(pending)} to look up.")
+
+    with stage("vintage lookups", rows_in=len(pending)) as lookup_stage:
+        if pending and args.backend == "http":
+            from catalog_http import CATALOG_SEARCH_URL, iter_vintages
+            today = date.today().isoformat()
+
+            try:
+                lookups = iter_vintages(pending, workers=args.workers, requests_per_second=args.rate,
+                                        base_url=args.catalog_url or CATALOG_SEARCH_URL)
+                for i, (adapter, vintage) in enumerate(lookups, start=1):
+                    # A failed search isn't cached, so the next run tries it again
+                    if vintage is None:
+                        continue
+                    print(f"{'✅' if vintage != NOT_FOUND else '❌'} {adapter} - Last Updated: {vintage}")
+                    cache[adapter] = (vintage, today)
+
+                    # Persist progress regularly so an interrupted run doesn't repeat its lookups
+                    if i % 25 == 0:
+                        save_vintage_cache(cache)
+            finally:
+                save_vintage_cache(cache)
+        elif pending:
+            driver = start_browser()
+            today = date.today().isoformat()
+
+            try:
+                for i, adapter in enumerate(pending, start=1):
+                    # A failed search isn't cached, so the next run tries it again
+                    vintage = lookup_vintage(driver, adapter)
+                    if vintage is not None:
+                        cache[adapter] = (vintage, today)
+
+                    # Persist progress regularly so an interrupted run doesn't repeat its lookups
+                    if i % 25 == 0:
+                        save_vintage_cache(cache)
+
+                    # Minimum delay between requests
+                    time.sleep(random.uniform(1.2, 2.5))
+            finally:
+                # Close WebDriver
+                driver.quit()
+                save_vintage_cache(cache)
+        else:
+            save_vintage_cache(cache)
+        lookup_stage["rows_out"] = sum(cache.get(adapter, (NOT_FOUND, ""))[0] != NOT_FOUND for adapter in pending)
+
+    # Create the Driver Vintage column from the cache
+    df["Driver Vintage"] = [NOT_FOUND if is_missing(adapter) else cache.get(adapter, (NOT_FOUND, ""))[0]
+                            for adapter in df["Adapter-Driver"]]
+
+    # Save the updated DataFrame to CSV
+    df.to_csv(output_file_path, index=False)
+    print(f"\n✅ File saved: {output_file_path}")
+
+
+if __name__ == "__main__":
+    main()
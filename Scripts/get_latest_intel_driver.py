@@ -6,6 +6,10 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
+from run_metrics import start_run
+
+# Record this run's wall/CPU time and peak memory under metrics/
+start_run()
 
 # Set up Chrome options (headless mode)
 options = Options()
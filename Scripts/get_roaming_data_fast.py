@@ -1,120 +1,101 @@
 import os
+import time
+import argparse
 import requests
 import pandas as pd
 from tqdm import tqdm
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
-
-# Current date for output file naming
+from token_cache import get_auth_token, invalidate_token
+from roaming_decode import PayloadError, decode_payload
+from driver_ids import concat_coded
+from normalization import default_normalizer
+from run_metrics import stage, record_customer, failure_reason, lost_customers
+from fetch_scheduler import DEFAULT_MAX_CONCURRENCY, request_with_retry, report_lost, shared_limit
+from history_store import STORE_DIR, write_day
+
+# Current date for the History partition
 today_date = datetime.now().strftime("%Y-%m-%d")
 
-# Define your save directory
-output_dir = r"History"
-os.makedirs(output_dir, exist_ok=True)  # Ensure the directory exists
-
-# Define output filename
-MASTER_OUTPUT_FILE = "roaming_data"
-output_filename = os.path.join(output_dir, f"{MASTER_OUTPUT_FILE}_{today_date}.csv")
-
-# API URLs
-ROAMING_URL = 'https://api-v2.7signal.com/kpis/agents/adapter-drivers?type=ROAMING&includeClientCount=true'
-AUTH_URL = 'https://api-v2.7signal.com/oauth2/token'
+# API URLs (set SEVENSIGNAL_API_BASE to point at another server, e.g. mock_7signal_api.py)
+API_BASE = os.environ.get("SEVENSIGNAL_API_BASE", "https://api-v2.7signal.com").rstrip("/")
+ROAMING_URL = f'{API_BASE}/kpis/agents/adapter-drivers?type=ROAMING&includeClientCount=true'
+AUTH_URL = f'{API_BASE}/oauth2/token'
 
 # Excel file containing customer details
 EXCEL_PATH = "Customer_Data.xlsx"
 
-# Read customer credentials
-customers_df = pd.read_excel(EXCEL_PATH)
-
-# Function to fetch authentication token
-def get_auth_token(client_id, client_secret):
-    auth_data = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "grant_type": "client_credentials"
-    }
-    auth_headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/x-www-form-urlencoded"
-    }
-    try:
-        response = requests.post(AUTH_URL, data=auth_data, headers=auth_headers, timeout=10)
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except requests.RequestException:
-        return None
+# Decode the API response body straight into a DataFrame (None when it has no rows)
+def parse_roaming_data(body):
+    return decode_payload(body)
 
-# Function to fetch and process data for a customer
+# Function to fetch and process data for a customer (timings and any failure go to the run's metrics)
 def fetch_customer_data(client_info):
     client_id, client_secret = client_info
-    token = get_auth_token(client_id, client_secret)
-    
-    if not token:
-        return None
-    
-    headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
-    
+    fetch_metrics = {"auth_seconds": None, "fetch_seconds": None, "payload_bytes": None, "rows": None, "retries": 0, "error": None}
+
     try:
-        response = requests.get(ROAMING_URL, headers=headers, timeout=10)
-        response.raise_for_status()
-        roaming_data = response.json().get('results', [])
+        start = time.perf_counter()
+        token = get_auth_token(AUTH_URL, client_id, client_secret)
+        fetch_metrics["auth_seconds"] = round(time.perf_counter() - start, 3)
 
-        if not roaming_data:
+        if not token:
+            fetch_metrics["error"] = "authentication failed"
             return None
 
-        # Convert JSON to DataFrame efficiently
-        data = []
-        for entry in roaming_data:
-            adapter = entry.get('driverProvider', 'Unknown')  # Adapter column
-            driver = entry.get('driverVersion', 'Unknown')    # Driver column
-            adapter_driver = f"{adapter} - {driver}"          # Concatenated Adapter-Driver column
-            
-    
-            for type_info in entry.get("types", []):
-                data.append({
-                    "Adapter": adapter,
-                    "Driver": driver,
-                    "Adapter-Driver": adapter_driver,  # Keep the concatenated version
-                    "goodSum": type_info.get("goodSum", 0),
-                    "criticalSum": type_info.get("criticalSum", 0),
-                    "warningSum": type_info.get("warningSum", 0),
-                    "clientCount": entry.get("clientCount", 0)
-                })
-        return pd.DataFrame(data)
-
-    except requests.RequestException:
-        return None
-
-# **Use Multi-Threading to Fetch Data Faster**
-with ThreadPoolExecutor(max_workers=10) as executor:
-    results = list(tqdm(executor.map(fetch_customer_data, zip(customers_df['client_id'], customers_df['client_secret'])), 
-                        total=len(customers_df), desc="Fetching Data"))
-
-# Combine all customer data into a single DataFrame
-data_frames = [df for df in results if df is not None]
-
-if data_frames:
-    master_df = pd.concat(data_frames, ignore_index=True)
+        headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
+
+        try:
+            start = time.perf_counter()
+            response = request_with_retry("GET", ROAMING_URL, headers=headers, timeout=10, fetch_metrics=fetch_metrics)
+
+            # A cached token can be revoked before it expires; get a fresh one and retry once
+            if response.status_code == 401:
+                invalidate_token(client_id)
+                token = get_auth_token(AUTH_URL, client_id, client_secret)
+                if not token:
+                    fetch_metrics["error"] = "authentication failed after 401"
+                    return None
+                headers["Authorization"] = f"Bearer {token}"
+                response = request_with_retry("GET", ROAMING_URL, headers=headers, timeout=10, fetch_metrics=fetch_metrics)
+
+            response.raise_for_status()
+            fetch_metrics["fetch_seconds"] = round(time.perf_counter() - start, 3)
+            fetch_metrics["payload_bytes"] = len(response.content)
+
+            customer_df = parse_roaming_data(response.content)
+            fetch_metrics["rows"] = 0 if customer_df is None else len(customer_df)
+            return customer_df
+
+        # A failed request or an undecodable body loses this customer only
+        except (requests.RequestException, PayloadError) as e:
+            fetch_metrics["error"] = failure_reason(e)
+            return None
+    finally:
+        record_customer(client_id, **fetch_metrics)
+
+# Sum per-customer frames into the daily History rollup (any 'Account Name' column is dropped)
+def build_history_rollup(data_frames):
+    master_df = concat_coded(data_frames)
 
     # Group and aggregate data
-    master_df = master_df.groupby(['Adapter', 'Driver', 'Adapter-Driver'], as_index=False).agg({
+    master_df = master_df.groupby(['Adapter', 'Driver', 'Adapter-Driver'], as_index=False, observed=True).agg({
         'goodSum': 'sum',
         'criticalSum': 'sum',
         'warningSum': 'sum',
         'clientCount': 'sum'
     })
 
-    
-    # Strip the first word and dash in 'Adapter' and 'Adapter-Driver'
-    master_df['Adapter'] = master_df['Adapter'].str.replace(r'^[^-]*-\s*', '', regex=True)
-    master_df['Adapter-Driver'] = master_df['Adapter-Driver'].str.replace(r'^[^-]*-\s*', '', regex=True)
+
+    # Strip the first word and dash in 'Adapter' and 'Adapter-Driver' ("vendor_prefix" rules, once per distinct value)
+    master_df = default_normalizer().apply("vendor_prefix", master_df)
 
     # Add totalSum column
     master_df['totalSum'] = master_df[['goodSum', 'criticalSum', 'warningSum']].sum(axis=1)
 
     # Compute "Good Roaming Calculation (%)"
     master_df['Good Roaming Calculation (%)'] = ((1 - (master_df['criticalSum'] / master_df['totalSum'])) * 100).fillna(100)
-    
+
     # Format to one decimal place with a % sign
     master_df['Good Roaming Calculation (%)'] = master_df['Good Roaming Calculation (%)'].map(lambda x: f"{x:.1f}%")
 
@@ -130,9 +111,56 @@ if data_frames:
         'totalSum': 'Total Sum'
     }, inplace=True)
 
-    # Save DataFrame to CSV
-    master_df.to_csv(output_filename, index=False)
-    print(f"✅ Roaming data successfully saved to: {output_filename}")
-
-else:
-    print("⚠️ No valid data collected. CSV file was not created.")
+    return master_df
+
+# Save the daily rollup into History as the day's Parquet partition (no daily CSV any more; older
+# History/roaming_data_<date>.csv files are converted once with migrate_history_to_parquet.py)
+def write_history_file(master_df, date=today_date, store_dir=STORE_DIR):
+    partition = write_day(master_df, date, store_dir)
+    print(f"✅ Roaming data successfully saved to: {partition}")
+
+
+def main():
+    # Command-line options: either engine shares one pooled, keep-alive session across customers
+    parser = argparse.ArgumentParser(description="Fetch today's adapter-driver roaming data for every customer.")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads",
+                        help="threads: a thread per request in flight (default); async: one event loop. Both use pooled keep-alive connections")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Most requests in flight at once; the fetcher adapts below it to latency and throttling")
+    args = parser.parse_args()
+
+    # Read customer credentials
+    customers_df = pd.read_excel(EXCEL_PATH)
+    clients = zip(customers_df['client_id'], customers_df['client_secret'])
+
+    with stage("fetch", rows_in=len(customers_df)) as fetch_stage:
+        if args.engine == "async":
+            # **Use asyncio with a pooled HTTP session**
+            from async_fetch import fetch_all
+            results = fetch_all(AUTH_URL, ROAMING_URL, clients, parse_roaming_data, concurrency=args.concurrency, timeout=10)
+        else:
+            # **Use Multi-Threading to Fetch Data Faster** (requests in flight follow the adaptive limit)
+            shared_limit.reset(maximum=args.concurrency)
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                results = list(tqdm(executor.map(fetch_customer_data, clients),
+                                    total=len(customers_df), desc="Fetching Data"))
+
+        # Combine all customer data into a single DataFrame
+        data_frames = [df for df in results if df is not None]
+        fetch_stage["rows_out"] = sum(len(df) for df in data_frames)
+
+    names = dict(zip(customers_df['client_id'].astype(str), customers_df['account_name'])) if 'account_name' in customers_df else {}
+    report_lost(lost_customers(), names)
+
+    if data_frames:
+        with stage("rollup", rows_in=sum(len(df) for df in data_frames)) as rollup_stage:
+            master_df = build_history_rollup(data_frames)
+            rollup_stage["rows_out"] = len(master_df)
+        with stage("write", rows_in=len(master_df)):
+            write_history_file(master_df)
+    else:
+        print("⚠️ No valid data collected. CSV file was not created.")
+
+
+if __name__ == "__main__":
+    main()
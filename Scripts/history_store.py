@@ -0,0 +1,121 @@
+import os
+import re
+import glob
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.dataset as ds
+
+# Columnar History: one Parquet file per day under History/parquet/date=YYYY-MM-DD/
+HISTORY_DIR = "History"
+STORE_DIR = os.path.join(HISTORY_DIR, "parquet")
+PARTITION_FILE = "roaming_data.parquet"
+
+STRING_COLUMNS = ['Adapter', 'Driver', 'Adapter-Driver']
+SUM_COLUMNS = ['Good Sum', 'Critical Sum', 'Warning Sum', 'Client Count', 'Total Sum']
+PERCENT_COLUMN = 'Good Roaming Calculation (%)'
+
+# Typed schema: dictionary-encoded strings, integer sums and a float percentage
+SCHEMA = pa.schema(
+    [pa.field(col, pa.dictionary(pa.int32(), pa.string())) for col in STRING_COLUMNS]
+    + [pa.field(col, pa.int64()) for col in SUM_COLUMNS]
+    + [pa.field(PERCENT_COLUMN, pa.float64())]
+)
+
+_date_pattern = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+
+# Date a History source covers, from its name (roaming_data_<date>[_processed].csv or date=<date>/)
+def history_date(path):
+    match = _date_pattern.search(path)
+    return match.group(1) if match else None
+
+
+def partition_path(date, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"date={date}", PARTITION_FILE)
+
+
+# {date: path} for every day already in the columnar store
+def list_partitions(store_dir=STORE_DIR):
+    partitions = {}
+    for path in glob.glob(os.path.join(store_dir, "date=*", PARTITION_FILE)):
+        date = os.path.basename(os.path.dirname(path))[len("date="):]
+        partitions[date] = path
+    return dict(sorted(partitions.items()))
+
+
+# Every History source to read: Parquet partitions, plus CSVs for days not yet migrated
+def history_sources(folder_path=HISTORY_DIR, store_dir=None):
+    if store_dir is None:
+        store_dir = os.path.join(folder_path, "parquet")
+    partitions = list_partitions(store_dir)
+
+    sources = list(partitions.values())
+    for file in glob.glob(os.path.join(folder_path, "roaming_data*.csv")):
+        if history_date(file) not in partitions:
+            sources.append(file)
+    return sources
+
+
+# Convert a History CSV-shaped frame ("99.9%" strings, object columns) to the typed schema
+def to_typed_frame(df):
+    df = df.copy()
+    if df[PERCENT_COLUMN].dtype != float:
+        df[PERCENT_COLUMN] = pd.to_numeric(df[PERCENT_COLUMN].astype(str).str.rstrip('%'), errors='coerce')
+    for col in SUM_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int64')
+    for col in STRING_COLUMNS:
+        df[col] = df[col].astype(object).where(df[col].notna(), None)
+    return df[STRING_COLUMNS + SUM_COLUMNS + [PERCENT_COLUMN]]
+
+
+# Write one day's rollup as a Parquet partition
+def write_day(df, date, store_dir=STORE_DIR):
+    path = partition_path(date, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    table = pa.Table.from_pandas(to_typed_frame(df), schema=SCHEMA, preserve_index=False)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression='zstd', use_dictionary=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+# Read one source (Parquet partition or legacy CSV) with only the requested columns, typed
+def read_source(path, columns=None):
+    if path.endswith(".parquet"):
+        return pq.read_table(path, columns=columns).to_pandas()
+    df = pd.read_csv(path, usecols=columns)
+    if PERCENT_COLUMN in df.columns and df[PERCENT_COLUMN].dtype != float:
+        df[PERCENT_COLUMN] = pd.to_numeric(df[PERCENT_COLUMN].astype(str).str.rstrip('%'), errors='coerce')
+    return df
+
+
+# Read the whole History (or selected dates) with a 'Date' column, pulling only the needed columns
+def read_history(columns=None, dates=None, folder_path=HISTORY_DIR):
+    store_dir = os.path.join(folder_path, "parquet")
+    partitions = list_partitions(store_dir)
+    if dates is not None:
+        dates = set(dates)
+        partitions = {date: path for date, path in partitions.items() if date in dates}
+
+    frames = []
+    if partitions:
+        # One scan over all partition files; the date comes from the date=YYYY-MM-DD directory
+        partitioning = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+        dataset = ds.dataset(list(partitions.values()), format='parquet', partitioning=partitioning, partition_base_dir=store_dir)
+        table = dataset.to_table(columns=None if columns is None else list(columns) + ['date'])
+        df = table.to_pandas().rename(columns={'date': 'Date'})
+        frames.append(df[['Date'] + [col for col in df.columns if col != 'Date']])
+
+    # Days that only exist as legacy CSV files
+    for path in history_sources(folder_path):
+        date = history_date(path)
+        if path.endswith(".csv") and (dates is None or date in dates):
+            df = read_source(path, columns)
+            df.insert(0, 'Date', date)
+            frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=['Date'] + list(columns or STRING_COLUMNS + SUM_COLUMNS + [PERCENT_COLUMN]))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,135 @@
+import os
+import io
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import contextlib
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from mock_7signal_api import add_server_arguments, client_credentials
+from run_metrics import request_seconds, latency_percentiles
+
+# Load-tests the fetchers (thread and asyncio engines) at several concurrency settings against mock_7signal_api.py,
+# reporting throughput, lost customers, throttling/errors and request latency (p50/p95/p99). Latency is timed in
+# the fetchers, per request attempt, from sending it to having the whole response; the mock server's own
+# arrival-to-response times are kept alongside as server_latency_ms.
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Start the mock API in its own process (so it doesn't share the fetchers' GIL); returns (process, base URL)
+def start_mock_server(args):
+    port = _free_port()
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, "mock_7signal_api.py"), "--port", str(port),
+               "--customers", str(args.customers), "--entries", str(args.entries),
+               "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+               "--error-rate", str(args.error_rate), "--throttle-rate", str(args.throttle_rate),
+               "--max-rps", str(args.max_rps), "--capacity", str(args.capacity),
+               "--token-ttl", str(args.token_ttl), "--seed", str(args.seed)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if "listening" not in line:
+        process.kill()
+        raise RuntimeError(f"Mock API did not start: {line.strip()}")
+    return process, f"http://127.0.0.1:{port}"
+
+
+def run_trial(engine, concurrency, clients, api_base, daily, fetch_all, clear_tokens, shared_limit, request_seconds):
+    # Every trial starts cold: no cached tokens, fresh server-side stats, the thread fetchers' limit back at its start
+    clear_tokens()
+    requests.post(f"{api_base}/_reset", timeout=10)
+    shared_limit.reset(maximum=concurrency)
+    first_request = len(request_seconds())
+
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(io.StringIO()):
+        if engine == "async":
+            results = fetch_all(daily.AUTH_URL, daily.ROAMING_URL, clients, daily.parse_roaming_data,
+                                concurrency=concurrency, timeout=30)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(daily.fetch_customer_data, clients))
+    seconds = time.perf_counter() - start
+    client_seconds = request_seconds()[first_request:]
+
+    stats = requests.get(f"{api_base}/_stats", timeout=10).json()
+    statuses = stats["statuses"]
+    fetched = sum(result is not None for result in results)
+    return {
+        "engine": engine,
+        "concurrency": concurrency,
+        "seconds": seconds,
+        "customers": len(clients),
+        "fetched": fetched,
+        "lost": len(clients) - fetched,
+        "customers_per_second": fetched / seconds if seconds else 0.0,
+        "requests": stats["requests"],
+        "throttled": statuses.get("429", 0),
+        "server_errors": sum(count for status, count in statuses.items() if status.startswith("5")),
+        "latency_ms": latency_percentiles(client_seconds),
+        "server_latency_ms": stats["latency_ms"],
+        "bytes": stats["bytes_sent"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the roaming fetchers against a local mock 7signal API.")
+    parser.add_argument("--engines", nargs="+", choices=["threads", "async"], default=["threads", "async"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[3, 5, 10, 20], help="Concurrency settings to try")
+    parser.add_argument("--api-base", default=None, help="Use an already running mock API instead of starting one")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    process = None
+    api_base = args.api_base
+    if api_base is None:
+        process, api_base = start_mock_server(args)
+        print(f"✅ Mock 7signal API started at {api_base}")
+
+    # The fetchers read their URLs and token cache location when imported
+    token_dir = tempfile.mkdtemp(prefix="roaming_load_test_")
+    os.environ["SEVENSIGNAL_API_BASE"] = api_base
+    os.environ["ROAMING_TOKEN_CACHE"] = os.path.join(token_dir, "oauth_tokens.json")
+    import get_roaming_data_fast as daily
+    from async_fetch import fetch_all
+    from token_cache import clear_tokens
+    from fetch_scheduler import shared_limit
+
+    clients = [client_credentials(i) for i in range(args.customers)]
+    results = []
+    try:
+        print(f"{'engine':<8} {'conc':>4} {'seconds':>8} {'cust/s':>7} {'lost':>5} {'reqs':>5} {'429':>5} {'5xx':>5}"
+              f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'srv p95':>8}")
+        for engine in args.engines:
+            for concurrency in args.concurrency:
+                result = run_trial(engine, concurrency, clients, api_base, daily, fetch_all, clear_tokens, shared_limit,
+                                   request_seconds)
+                results.append(result)
+                latency = result["latency_ms"]
+                server_p95 = result["server_latency_ms"]["p95"]
+                print(f"{engine:<8} {concurrency:>4} {result['seconds']:>8.2f} {result['customers_per_second']:>7.1f}"
+                      f" {result['lost']:>5} {result['requests']:>5} {result['throttled']:>5} {result['server_errors']:>5}"
+                      f" {latency['p50'] or 0:>8.1f} {latency['p95'] or 0:>8.1f} {latency['p99'] or 0:>8.1f} {server_p95 or 0:>8.1f}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import pandas as pd
 import os
+from run_metrics import stage
+from dashboard_export import export_dashboard, dashboard_outputs
 
 # Define file paths
 file1_path = "Output/aggregated_roaming_data.csv"  # Main dataset
@@ -7,35 +9,46 @@ file2_path = "Output/aggregated_roaming_data_with_vintage.csv"  # Contains Drive
 
 # Define output file paths
 output_csv_path = "Output/merged_roaming_analysis_with_vintage.csv"
-output_json_path = "Output/merged_roaming_analysis_with_vintage.json"
 output_data_json_path = "Output/data.json"
+output_dashboard_paths = dashboard_outputs(os.path.dirname(output_data_json_path))
 
-# Load the CSV files into DataFrames
-df1 = pd.read_csv(file1_path)  # Main data
-df2 = pd.read_csv(file2_path)  # Contains 'Driver Vintage' column
 
-# Keep only necessary columns from df2
-df2 = df2[['Adapter-Driver', 'Driver Vintage']]
+# Left-join each driver's vintage onto the aggregated data
+def merge_vintage(df1, df2):
+    # Keep only necessary columns from df2
+    df2 = df2[['Adapter-Driver', 'Driver Vintage']].copy()
 
-# Convert 'Driver Vintage' to datetime format
-df2['Driver Vintage'] = pd.to_datetime(df2['Driver Vintage'], errors='coerce').dt.strftime('%Y-%m-%d')
+    # Convert 'Driver Vintage' to datetime format
+    df2['Driver Vintage'] = pd.to_datetime(df2['Driver Vintage'], errors='coerce').dt.strftime('%Y-%m-%d')
 
 
-# Perform a left merge to bring in Driver Vintage where available
-merged_df = pd.merge(df1, df2, on="Adapter-Driver", how="left")
+    # Perform a left merge to bring in Driver Vintage where available
+    merged_df = pd.merge(df1, df2, on="Adapter-Driver", how="left")
 
-# Ensure Adapter and Driver columns are retained during merge
-if 'Adapter' in df1.columns and 'Driver' in df1.columns:
-    merged_df[['Adapter', 'Driver']] = df1[['Adapter', 'Driver']]
+    # Ensure Adapter and Driver columns are retained during merge
+    if 'Adapter' in df1.columns and 'Driver' in df1.columns:
+        merged_df[['Adapter', 'Driver']] = df1[['Adapter', 'Driver']]
 
-# Save the merged DataFrame to a CSV file
-merged_df.to_csv(output_csv_path, index=False)
+    return merged_df
 
-# Save the merged DataFrame to a JSON file (without index)
-merged_df.to_json(output_json_path, orient="records", indent=4)
-merged_df.to_json(output_data_json_path, orient="records", indent=4)
 
+def write_merged(merged_df):
+    # Save the merged DataFrame to a CSV file
+    merged_df.to_csv(output_csv_path, index=False)
 
-print(f"✅ CSV output saved to: {output_csv_path}")
-print(f"✅ JSON output saved to: {output_json_path}")
-print(f"✅ JSON output saved to: {output_data_json_path}")
+    print(f"✅ CSV output saved to: {output_csv_path}")
+
+    # Serialize the dashboard JSON once (records and column layouts, compact, with .gz/.br siblings);
+    # files whose content is unchanged are not rewritten
+    export_dashboard(merged_df, os.path.dirname(output_data_json_path))
+
+
+if __name__ == "__main__":
+    # Load the CSV files into DataFrames
+    df1 = pd.read_csv(file1_path)  # Main data
+    df2 = pd.read_csv(file2_path)  # Contains 'Driver Vintage' column
+
+    with stage("merge", rows_in=len(df1)) as merge_stage:
+        merged_df = merge_vintage(df1, df2)
+        merge_stage["rows_out"] = len(merged_df)
+        write_merged(merged_df)
@@ -0,0 +1,47 @@
+import os
+import glob
+import argparse
+import pandas as pd
+from history_store import HISTORY_DIR, STORE_DIR, history_date, partition_path, write_day, read_source
+
+# One-shot conversion of the History/roaming_data_*.csv files into the columnar store
+
+
+def migrate(folder_path=HISTORY_DIR, store_dir=STORE_DIR, overwrite=False):
+    files = sorted(glob.glob(os.path.join(folder_path, "roaming_data*.csv")))
+    converted = skipped = 0
+
+    for file in files:
+        date = history_date(file)
+        if date is None:
+            print(f"⚠️ No date in file name, skipping: {file}")
+            continue
+
+        if os.path.exists(partition_path(date, store_dir)) and not overwrite:
+            skipped += 1
+            continue
+
+        try:
+            df = pd.read_csv(file)
+            path = write_day(df, date, store_dir)
+        except Exception as e:
+            print(f"Error converting {file}: {e}")
+            continue
+
+        # Check the partition reads back with the same rows and totals
+        check = read_source(path, columns=['Critical Sum', 'Total Sum'])
+        if len(check) != len(df) or check['Total Sum'].sum() != pd.to_numeric(df['Total Sum'], errors='coerce').sum():
+            print(f"❌ Verification failed for {path}")
+            continue
+
+        converted += 1
+
+    print(f"✅ Converted {converted} History file(s) to {store_dir} ({skipped} already present)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert History CSV files into date-partitioned Parquet.")
+    parser.add_argument("--overwrite", action="store_true", help="Rewrite partitions that already exist")
+    args = parser.parse_args()
+
+    migrate(overwrite=args.overwrite)
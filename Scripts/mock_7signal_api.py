@@ -0,0 +1,203 @@
+import time
+import json
+import uuid
+import random
+import asyncio
+import argparse
+from collections import Counter, deque
+from aiohttp import web
+from generate_synthetic_data import MANUFACTURERS
+
+# Local stand-in for the two 7signal endpoints the fetchers use (/oauth2/token and /kpis/agents/adapter-drivers),
+# with configurable latency, failures, throttling and payload size. Point the fetchers at it with
+# SEVENSIGNAL_API_BASE=http://127.0.0.1:<port>. GET /_stats returns what the server saw; POST /_reset clears it.
+
+
+def client_credentials(index):
+    return f"client-{index:04d}", f"secret-{index:04d}"
+
+
+# Write a Customer_Data.xlsx-style workbook for the mock's customers
+def write_customer_file(path, customers):
+    import pandas as pd
+
+    rows = [(*client_credentials(i), f"Mock Customer {i:04d}") for i in range(customers)]
+    pd.DataFrame(rows, columns=["client_id", "client_secret", "account_name"]).to_excel(path, index=False)
+
+
+# An adapter-drivers response body with the given number of entries, the same for a customer on every call
+def build_payload(customer_index, entries, seed):
+    rng = random.Random(seed * 100003 + customer_index)
+    models = [f"{maker} {model}" for maker, names in MANUFACTURERS.items() for model in names]
+    results = []
+    for _ in range(entries):
+        total = rng.randint(100, 50000)
+        critical = int(total * rng.choice([0.0, 0.001, 0.004, 0.02, 0.15]))
+        warning = int((total - critical) * 0.02)
+        results.append({
+            "driverProvider": f"WLAN - {rng.choice(models)}",
+            "driverVersion": f"{rng.randint(20, 24)}.{rng.randint(0, 200)}.{rng.randint(0, 9)}.{rng.randint(0, 9)}",
+            "clientCount": rng.randint(1, 200),
+            "types": [{"type": "ROAMING", "goodSum": total - critical - warning, "criticalSum": critical, "warningSum": warning}]
+        })
+    return json.dumps({"results": results}, separators=(",", ":")).encode()
+
+
+class MockApi:
+    def __init__(self, customers=100, entries=150, latency_ms=80.0, jitter_ms=40.0, error_rate=0.0,
+                 throttle_rate=0.0, max_rps=0.0, capacity=0, token_ttl=3600, seed=7):
+        self.customers = {client_credentials(i)[0]: (i, client_credentials(i)[1]) for i in range(customers)}
+        self.entries = entries
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.capacity = asyncio.Semaphore(capacity) if capacity > 0 else None
+        self.token_ttl = token_ttl
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.tokens = {}
+        self.payloads = {}
+        self.recent = deque()
+        self.reset()
+
+    def reset(self):
+        self.statuses = Counter()
+        self.latencies = []
+        self.bytes_sent = 0
+        self.started = time.monotonic()
+
+    # Requests above --max-rps in the last second, or a random --throttle-rate share, get a 429
+    def _throttled(self):
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] > 1.0:
+            self.recent.popleft()
+        self.recent.append(now)
+        if self.max_rps and len(self.recent) > self.max_rps:
+            return True
+        return self.rng.random() < self.throttle_rate
+
+    async def _simulate(self):
+        await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+        if self._throttled():
+            raise web.HTTPTooManyRequests(headers={"Retry-After": "1"})
+        if self.rng.random() < self.error_rate:
+            raise web.HTTPInternalServerError(text="mock failure")
+
+    async def token(self, request):
+        await self._simulate()
+        form = await request.post()
+        customer = self.customers.get(form.get("client_id"))
+        if customer is None or customer[1] != form.get("client_secret"):
+            raise web.HTTPUnauthorized(text="invalid client")
+
+        access_token = uuid.uuid4().hex
+        self.tokens[access_token] = (customer[0], time.time() + self.token_ttl)
+        return web.json_response({"access_token": access_token, "token_type": "Bearer", "expires_in": self.token_ttl})
+
+    async def adapter_drivers(self, request):
+        await self._simulate()
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        customer_index, expires_at = self.tokens.get(token, (None, 0))
+        if customer_index is None or expires_at < time.time():
+            raise web.HTTPUnauthorized(text="invalid token")
+
+        if customer_index not in self.payloads:
+            self.payloads[customer_index] = build_payload(customer_index, self.entries, self.seed)
+        body = self.payloads[customer_index]
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/json")
+
+    async def stats(self, request):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000 if latencies else None
+
+        return web.json_response({
+            "requests": len(latencies),
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "latency_ms": {"p50": percentile(50), "p95": percentile(95), "p99": percentile(99), "max": percentile(100)},
+            "bytes_sent": self.bytes_sent,
+            "seconds": time.monotonic() - self.started
+        })
+
+    async def reset_stats(self, request):
+        self.reset()
+        return web.json_response({"reset": True})
+
+    # Time every API request from arrival to response, including any wait for a --capacity slot
+    @web.middleware
+    async def record(self, request, handler):
+        if request.path.startswith("/_"):
+            return await handler(request)
+
+        start = time.perf_counter()
+        status = 500
+        try:
+            if self.capacity:
+                async with self.capacity:
+                    response = await handler(request)
+            else:
+                response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+            self.statuses[status] += 1
+
+    def app(self):
+        app = web.Application(middlewares=[self.record])
+        app.router.add_post("/oauth2/token", self.token)
+        app.router.add_get("/kpis/agents/adapter-drivers", self.adapter_drivers)
+        app.router.add_get("/_stats", self.stats)
+        app.router.add_post("/_reset", self.reset_stats)
+        return app
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--customers", type=int, default=100, help="Valid client-NNNN / secret-NNNN pairs")
+    parser.add_argument("--entries", type=int, default=150, help="Adapter-driver entries per response (payload size)")
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Mean added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=40.0, help="Standard deviation of the added latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Requests per second above which every request gets a 429 (0: no limit)")
+    parser.add_argument("--capacity", type=int, default=0, help="Requests served at once; the rest queue (0: no limit)")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="expires_in of issued tokens")
+    parser.add_argument("--seed", type=int, default=7)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock 7signal API for load-testing the fetchers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--write-customers", default=None, help="Also write a Customer_Data.xlsx-style file for these customers")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    if args.write_customers:
+        write_customer_file(args.write_customers, args.customers)
+        print(f"✅ Customer file written to {args.write_customers}")
+
+    async def serve():
+        api = MockApi(args.customers, args.entries, args.latency_ms, args.jitter_ms, args.error_rate,
+                      args.throttle_rate, args.max_rps, args.capacity, args.token_ttl, args.seed)
+        runner = web.AppRunner(api.app())
+        await runner.setup()
+        await web.TCPSite(runner, args.host, args.port).start()
+        print(f"✅ Mock 7signal API listening on http://{args.host}:{args.port}", flush=True)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import os
+import re
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Adapter/driver cleanup as data: normalization_rules.json (or the file named by ROAMING_NORMALIZATION_RULES) holds
+# named rule sets, each a list of steps per column, applied in order:
+#   {"fill_missing": ""}           missing values become this string
+#   {"drop_in": "unwanted"}        drop the row when the value is in that named list ("lists" in the file)
+#   {"drop_values": [...]}         the same with the values inline
+#   {"drop_match": "\\d"}          drop the row when the regex matches at the start of the value
+#   {"replace": "^[^-]*-\\s*", "with": ""}   regex substitution
+#   {"strip": true}, {"lower": true}
+# Rule sets:
+#   history        junk rows left out of the History aggregates (aggregate_roaming_data.py)
+#   vendor_prefix  the "<vendor> - " prefix stripped from fetched Adapter and Adapter-Driver values
+#   adapter_key    how adapter names are compared (per-account reports, driver index lookups)
+# Regexes are compiled once, steps run once per distinct value (categories, or factorized strings) and every result
+# is remembered, so cleanup costs grow with the number of distinct drivers, not rows. Adding a junk adapter means
+# editing the rules file only.
+RULES_FILE = os.environ.get("ROAMING_NORMALIZATION_RULES",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "normalization_rules.json"))
+
+# Result of a value whose row is dropped
+DROP = object()
+
+
+class RulesError(ValueError):
+    pass
+
+
+def _compile_step(step, lists):
+    if "fill_missing" in step:
+        return ("fill", step["fill_missing"])
+    if "drop_in" in step:
+        if step["drop_in"] not in lists:
+            raise RulesError(f"Unknown list: {step['drop_in']}")
+        return ("drop_in", frozenset(lists[step["drop_in"]]))
+    if "drop_values" in step:
+        return ("drop_in", frozenset(step["drop_values"]))
+    if "drop_match" in step:
+        return ("drop_match", re.compile(step["drop_match"]))
+    if "replace" in step:
+        return ("replace", re.compile(step["replace"]), step.get("with", ""))
+    if step.get("strip"):
+        return ("strip",)
+    if step.get("lower"):
+        return ("lower",)
+    raise RulesError(f"Unknown step: {step}")
+
+
+# One value through a column's compiled steps: the cleaned string, None (still missing) or DROP
+def _evaluate(steps, value):
+    if value is not None and not isinstance(value, str):
+        value = None if pd.isna(value) else str(value)
+    for step in steps:
+        kind = step[0]
+        if value is None:
+            if kind == "fill":
+                value = step[1]
+            continue
+        if kind == "drop_in":
+            if value in step[1]:
+                return DROP
+        elif kind == "drop_match":
+            if step[1].match(value):
+                return DROP
+        elif kind == "replace":
+            value = step[1].sub(step[2], value)
+        elif kind == "strip":
+            value = value.strip()
+        elif kind == "lower":
+            value = value.lower()
+    return value
+
+
+class Normalizer:
+    def __init__(self, config):
+        lists = config.get("lists", {})
+        self.signature = hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+        try:
+            self.rule_sets = {
+                name: {column: [_compile_step(step, lists) for step in steps] for column, steps in columns.items()}
+                for name, columns in config["rules"].items()
+            }
+        except (KeyError, TypeError, AttributeError, re.error) as e:
+            raise RulesError(f"Bad normalization rules: {e}")
+        # {(rule set, column): {raw value: result}}
+        self._memo = {}
+
+    @classmethod
+    def from_file(cls, path=RULES_FILE):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def _steps(self, name, column):
+        if name not in self.rule_sets:
+            raise RulesError(f"Unknown rule set: {name}")
+        return self.rule_sets[name].get(column)
+
+    # One value (e.g. an adapter name typed into a query)
+    def value(self, name, column, value):
+        steps = self._steps(name, column)
+        if steps is None:
+            return value
+        memo = self._memo.setdefault((name, column), {})
+        key = None if value is None or (not isinstance(value, str) and pd.isna(value)) else value
+        if key not in memo:
+            memo[key] = _evaluate(steps, key)
+        return memo[key]
+
+    # (cleaned values, boolean mask of rows to drop) for one column, evaluating each distinct value once.
+    # Changed columns come back as categoricals; a column the rules leave as it is comes back untouched.
+    def _map(self, name, column, series):
+        steps = self._steps(name, column)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            uniques = series.cat.categories.to_numpy(dtype=object).tolist()
+        else:
+            codes, uniques = pd.factorize(series)
+            uniques = uniques.to_numpy(dtype=object).tolist() if hasattr(uniques, "to_numpy") else list(uniques)
+
+        # Missing values have code -1, which picks the trailing None
+        memo = self._memo.setdefault((name, column), {})
+        uniques.append(None)
+        results = []
+        for value in uniques:
+            result = memo.get(value, memo)
+            if result is memo:
+                result = memo[value] = _evaluate(steps, value)
+            results.append(result)
+
+        dropped = np.fromiter((result is DROP for result in results), dtype=bool, count=len(results))
+        if not dropped.any() and results == uniques:
+            return series, np.zeros(len(series), dtype=bool)
+
+        kept = np.array([None if result is DROP else result for result in results], dtype=object)
+        result_codes, categories = pd.factorize(kept)
+        cleaned = pd.Categorical.from_codes(result_codes[codes], dtype=pd.CategoricalDtype(pd.Index(categories, dtype=object)), validate=False)
+        return pd.Series(cleaned, index=series.index, name=series.name), dropped[codes]
+
+    # A Series cleaned by the rule set's steps for `column` (rows that would be dropped become missing)
+    def series(self, name, column, series):
+        if self._steps(name, column) is None:
+            return series
+        return self._map(name, column, series)[0]
+
+    # df with every rule-set column cleaned (as categoricals) and the rows any of them drops left out
+    def apply(self, name, df):
+        if name not in self.rule_sets:
+            raise RulesError(f"Unknown rule set: {name}")
+        df = df.copy()
+        drop = np.zeros(len(df), dtype=bool)
+        for column in self.rule_sets[name]:
+            if column in df.columns:
+                df[column], dropped = self._map(name, column, df[column])
+                drop |= dropped
+        return df[~drop] if drop.any() else df
+
+
+_default = None
+
+
+# The Normalizer for RULES_FILE, loaded once per process
+def default_normalizer():
+    global _default
+    if _default is None:
+        _default = Normalizer.from_file()
+    return _default
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from aiohttp import web
+import merge_with_vintage as merge
+import calculate_manufacturers_and_samples as manufacturers
+import aggregate_critical_roaming_minutes as critical
+from driver_index import GOOD_THRESHOLD, normalize_adapter
+
+# Local HTTP API over the merged analysis, so the dashboard fetches only the slice it shows.
+# The merged CSV is loaded once (and again whenever it changes on disk) with indexes by adapter, manufacturer,
+# good-roaming bucket and vintage year, plus a precomputed order for every sort key.
+#   GET /totals                    headline numbers: drivers, total samples, critical minutes, manufacturer shares, buckets
+#   GET /facets                    filter values with their row counts
+#   GET /drivers?...               filtered, sorted, paginated rows:
+#       adapter, manufacturer, bucket, vintage_year (comma-separated for several), q (text in Adapter-Driver),
+#       min_good / max_good, min_samples, vintage_from / vintage_to (YYYY-MM-DD),
+#       sort (good, samples, clients, critical, vintage, adapter, driver; '-' prefix for descending), page, page_size
+#   GET /adapters/{adapter}        every driver of one adapter, best first
+
+# Good-roaming buckets: the recommendation threshold and the bad driver report threshold
+BUCKETS = [("good", GOOD_THRESHOLD), ("fair", 99.0), ("poor", float("-inf"))]
+
+SORT_COLUMNS = {
+    "good": "Good Roaming Calculation (%)",
+    "samples": "Total Sum",
+    "clients": "Client Count",
+    "critical": "Critical Sum",
+    "vintage": "Driver Vintage",
+    "adapter": "Adapter",
+    "driver": "Driver",
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+class QueryError(ValueError):
+    pass
+
+
+def bucket_name(good_pct):
+    if pd.isna(good_pct):
+        return "unknown"
+    return next(name for name, floor in BUCKETS if good_pct >= floor)
+
+
+# {value: row positions} for one column
+def _positions(values):
+    index = {}
+    for row, value in enumerate(values):
+        index.setdefault(value, []).append(row)
+    return {value: np.array(rows, dtype=np.int64) for value, rows in index.items()}
+
+
+def _split(value):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+class RoamingQuery:
+    def __init__(self, merged_df, totals=None):
+        self.df = merged_df.reset_index(drop=True)
+        self.totals = totals or {}
+        n = len(self.df)
+
+        self.good = pd.to_numeric(self.df["Good Roaming Calculation (%)"], errors="coerce").to_numpy(dtype=float)
+        self.samples = pd.to_numeric(self.df["Total Sum"], errors="coerce").to_numpy(dtype=float)
+        self.vintage = self.df["Driver Vintage"].astype(object).where(self.df["Driver Vintage"].notna(), "").astype(str).to_numpy() \
+            if "Driver Vintage" in self.df else np.full(n, "", dtype=object)
+        self.search_text = self.df["Adapter-Driver"].astype(str).str.lower().to_numpy()
+
+        adapters = [normalize_adapter(adapter) for adapter in self.df["Adapter"]]
+        makers = [manufacturers.manufacturer_name(value) for value in self.df["Adapter-Driver"]]
+        buckets = [bucket_name(pct) for pct in self.good]
+        years = [vintage[:4] if vintage[:4].isdigit() else "unknown" for vintage in self.vintage]
+
+        self.indexes = {
+            "adapter": _positions(adapters),
+            "manufacturer": _positions(makers),
+            "bucket": _positions(buckets),
+            "vintage_year": _positions(years),
+        }
+
+        # Row order for every sort key, both directions, missing values last either way
+        self.orders = {}
+        for key, column in SORT_COLUMNS.items():
+            if column not in self.df:
+                continue
+            for ascending in (True, False):
+                order = self.df[column].sort_values(ascending=ascending, kind="stable", na_position="last").index
+                self.orders[(key, ascending)] = order.to_numpy(dtype=np.int64)
+        self.orders[(None, True)] = np.arange(n, dtype=np.int64)
+
+    @classmethod
+    def from_files(cls, merged_path=merge.output_csv_path):
+        merged_df = pd.read_csv(merged_path)
+        totals = {"drivers": len(merged_df)}
+        try:
+            totals["total_samples"] = int(pd.read_csv(manufacturers.total_samples_output_file)["Total Sum"].iloc[0])
+        except (OSError, KeyError, IndexError, ValueError):
+            totals["total_samples"] = int(pd.to_numeric(merged_df["Total Sum"], errors="coerce").sum())
+        try:
+            totals["manufacturers"] = pd.read_csv(manufacturers.manufacturers_output_file).to_dict(orient="records")
+        except (OSError, ValueError):
+            totals["manufacturers"] = manufacturers.manufacturer_shares(merged_df).to_dict(orient="records")
+        try:
+            with open(critical.output_file) as f:
+                totals["critical_minutes"] = json.load(f)
+        except (OSError, ValueError):
+            totals["critical_minutes"] = None
+        return cls(merged_df, totals)
+
+    def headline(self):
+        buckets = {name: len(rows) for name, rows in self.indexes["bucket"].items()}
+        return dict(self.totals, buckets=buckets)
+
+    def facets(self):
+        return {name: {str(value): len(rows) for value, rows in sorted(index.items(), key=lambda item: -len(item[1]))}
+                for name, index in self.indexes.items()}
+
+    # Boolean row mask for the query's filters
+    def _mask(self, params):
+        mask = np.ones(len(self.df), dtype=bool)
+
+        for name, index in self.indexes.items():
+            if name not in params:
+                continue
+            values = _split(params[name])
+            if name == "adapter":
+                values = [normalize_adapter(value) for value in values]
+            selected = np.zeros(len(self.df), dtype=bool)
+            for value in values:
+                rows = index.get(value)
+                if rows is not None:
+                    selected[rows] = True
+            mask &= selected
+
+        try:
+            if "min_good" in params:
+                mask &= self.good >= float(params["min_good"])
+            if "max_good" in params:
+                mask &= self.good <= float(params["max_good"])
+            if "min_samples" in params:
+                mask &= self.samples >= float(params["min_samples"])
+        except ValueError as e:
+            raise QueryError(f"Bad number: {e}")
+
+        # ISO dates compare correctly as strings; rows without a vintage drop out of a vintage range
+        if "vintage_from" in params:
+            mask &= (self.vintage != "") & (self.vintage >= params["vintage_from"])
+        if "vintage_to" in params:
+            mask &= (self.vintage != "") & (self.vintage <= params["vintage_to"])
+
+        if params.get("q"):
+            needle = params["q"].lower()
+            mask &= np.fromiter((needle in text for text in self.search_text), dtype=bool, count=len(self.df))
+        return mask
+
+    # {"total", "page", "page_size", "pages", "rows"} for one page of the filtered, sorted rows
+    def drivers(self, params):
+        sort = params.get("sort")
+        ascending = not (sort or "").startswith("-")
+        key = (sort or "").lstrip("-") or None
+        if (key, ascending) not in self.orders:
+            raise QueryError(f"Unknown sort key: {sort} (use {', '.join(SORT_COLUMNS)})")
+
+        try:
+            page = max(1, int(params.get("page", 1)))
+            page_size = min(MAX_PAGE_SIZE, max(1, int(params.get("page_size", DEFAULT_PAGE_SIZE))))
+        except ValueError as e:
+            raise QueryError(f"Bad page: {e}")
+
+        order = self.orders[(key, ascending)]
+        selected = order[self._mask(params)[order]]
+        page_rows = selected[(page - 1) * page_size:page * page_size]
+        return {
+            "total": len(selected),
+            "page": page,
+            "page_size": page_size,
+            "pages": -(-len(selected) // page_size),
+            "rows": self.df.iloc[page_rows],
+        }
+
+
+# Serialize a result dict; a DataFrame under "rows" goes through pandas (NaN -> null, same number format as data.json)
+def _json_response(result):
+    rows = result.pop("rows", None)
+    body = json.dumps(result, separators=(",", ":"), default=str)
+    if rows is not None:
+        body = body[:-1] + ',"rows":' + rows.to_json(orient="records") + "}"
+    return web.Response(text=body, content_type="application/json", headers={"Access-Control-Allow-Origin": "*"})
+
+
+class QueryService:
+    def __init__(self, merged_path=merge.output_csv_path):
+        self.merged_path = merged_path
+        self.loaded_mtime = None
+        self.query = None
+        try:
+            self._refresh()
+        except web.HTTPServiceUnavailable as e:
+            print(f"⚠️ {e.text}; answering 503 until it exists")
+
+    # Reload when the merged CSV has changed on disk since it was loaded; 503 while it doesn't exist
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.merged_path).st_mtime_ns
+            if mtime != self.loaded_mtime:
+                start = time.perf_counter()
+                self.query = RoamingQuery.from_files(self.merged_path)
+                self.loaded_mtime = mtime
+                print(f"✅ Loaded {len(self.query.df):,} drivers from {self.merged_path} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        except FileNotFoundError:
+            raise web.HTTPServiceUnavailable(text=f"{self.merged_path} not found (run merge_with_vintage.py)")
+        return self.query
+
+    async def totals(self, request):
+        return _json_response(self._refresh().headline())
+
+    async def facets(self, request):
+        return _json_response(self._refresh().facets())
+
+    async def drivers(self, request):
+        try:
+            return _json_response(self._refresh().drivers(dict(request.query)))
+        except QueryError as e:
+            raise web.HTTPBadRequest(text=str(e))
+
+    async def adapter(self, request):
+        params = {"adapter": request.match_info["adapter"], "sort": request.query.get("sort", "-good"),
+                  "page_size": request.query.get("page_size", MAX_PAGE_SIZE)}
+        try:
+            result = self._refresh().drivers(params)
+        except QueryError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        if not result["total"]:
+            raise web.HTTPNotFound(text="unknown adapter")
+        return _json_response(result)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/totals", self.totals)
+        app.router.add_get("/facets", self.facets)
+        app.router.add_get("/drivers", self.drivers)
+        app.router.add_get("/adapters/{adapter}", self.adapter)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve filtered, sorted and paginated queries over the merged roaming analysis.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--merged", default=merge.output_csv_path, help="Merged analysis CSV to serve")
+    args = parser.parse_args()
+
+    service = QueryService(args.merged)
+    print(f"✅ Roaming query service listening on http://{args.host}:{args.port}", flush=True)
+    web.run_app(service.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
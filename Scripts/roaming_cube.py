@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+import aggregate_roaming_data as aggregate
+from datetime import date, timedelta
+from history_store import history_sources, history_date
+from run_metrics import stage
+from driver_ids import DriverIds, ID_COLUMN
+
+# Date x Adapter-Driver x metric cube over History, stored as cumulative sums so any date range is two slices:
+# sums(from, to) = cumulative[to] - cumulative[from - 1]. The arrays are memory-mapped, so a query only touches
+# the two date rows it needs. Built from the aggregation cache's per-file sums (same cleanup as
+# aggregate_roaming_data.py), so rebuilding after a new History day doesn't re-read the old ones.
+cube_dir = os.path.join(".cache", "roaming_cube")
+
+CUMULATIVE_FILE = "cumulative.npy"
+META_FILE = "meta.json"
+
+# The summed columns, plus how many History days each (Adapter-Driver, Adapter, Driver) appeared in
+METRICS = aggregate.sum_columns + ["Days Seen"]
+DAYS_SEEN = len(METRICS) - 1
+
+# Bump when the cube layout changes so old cubes are rebuilt
+CUBE_VERSION = 2
+
+
+# Identifies the History the cube was built from: every file's name and content digest, the cleanup rules and the
+# driver ID table its keys refer to
+def _signature(entries, ids):
+    digest = hashlib.sha1(f"{CUBE_VERSION}:{aggregate._rules_signature()}:{ids.generation}".encode())
+    for entry in entries:
+        digest.update(f"{entry['file']}={entry['sha1']}\n".encode())
+    return digest.hexdigest()
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class RoamingCube:
+    def __init__(self, path=cube_dir):
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        self.signature = meta["signature"]
+        self.dates = meta["dates"]
+        # Driver IDs (driver_ids.py) along the key axis
+        self.keys = np.asarray(meta["keys"], dtype=np.int64)
+
+        # (dates + 1) x keys x metrics; row 0 is all zeros so a range starting at the first date needs no special case
+        self.cumulative = np.load(os.path.join(path, CUMULATIVE_FILE), mmap_mode='r')
+
+    # Build (or reuse) the cube for the History in folder_path; rebuild=True also discards the aggregation cache
+    @classmethod
+    def build(cls, folder_path=aggregate.folder_path, path=cube_dir, rebuild=False):
+        ids = DriverIds()
+        entries = [entry for entry in aggregate.load_file_states(history_sources(folder_path), rebuild=rebuild, ids=ids)
+                   if history_date(entry['file'])]
+        signature = _signature(entries, ids)
+
+        if not rebuild:
+            try:
+                cube = cls(path)
+                if cube.signature == signature:
+                    return cube
+            except (OSError, ValueError, KeyError):
+                pass
+
+        # Several sources for one day (e.g. a re-run's CSV) are summed into the same date row
+        dates = sorted({history_date(entry['file']) for entry in entries})
+        date_index = {d: i for i, d in enumerate(dates)}
+
+        partials = [entry['partial'].assign(_date=date_index[history_date(entry['file'])]) for entry in entries]
+        combined_df = pd.concat(partials, ignore_index=True) if partials else \
+            pd.DataFrame(columns=[ID_COLUMN] + aggregate.sum_columns + ['_date'])
+
+        # Driver IDs in first-seen order, the order aggregate_roaming_data.py meets them in
+        key_ids, keys = pd.factorize(combined_df[ID_COLUMN].to_numpy(dtype=np.int64))
+
+        values = np.column_stack([combined_df[aggregate.sum_columns].to_numpy(dtype=np.int64),
+                                  np.ones(len(combined_df), dtype=np.int64)])
+        cumulative = np.zeros((len(dates) + 1, len(keys), len(METRICS)), dtype=np.int64)
+        np.add.at(cumulative, (combined_df['_date'].to_numpy(dtype=np.int64) + 1, key_ids), values)
+        np.cumsum(cumulative, axis=0, out=cumulative)
+
+        os.makedirs(path, exist_ok=True)
+
+        def write_meta(tmp_path):
+            with open(tmp_path, 'w') as f:
+                json.dump({"signature": signature, "metrics": METRICS, "dates": dates,
+                           "keys": keys.tolist()}, f)
+
+        def write_cumulative(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                np.save(f, cumulative)
+
+        # Arrays first, metadata last: a half-written cube has a stale signature and is rebuilt next time
+        _write_atomic(os.path.join(path, CUMULATIVE_FILE), write_cumulative)
+        _write_atomic(os.path.join(path, META_FILE), write_meta)
+        print(f"🧊 Cube built: {len(dates)} day(s) x {len(keys)} Adapter-Driver(s) x {len(METRICS)} metrics")
+        return cls(path)
+
+    # Positions of the first date >= start and one past the last date <= end (ISO date strings; None is open-ended)
+    def bounds(self, start=None, end=None):
+        first = 0 if start is None else int(np.searchsorted(self.dates, start, side='left'))
+        last = len(self.dates) if end is None else int(np.searchsorted(self.dates, end, side='right'))
+        return first, max(first, last)
+
+    # keys x metrics sums over [start, end]
+    def window_sums(self, start=None, end=None):
+        first, last = self.bounds(start, end)
+        return self.cumulative[last] - self.cumulative[first]
+
+    # Start date of the last `days` days of History, counting back from the newest day in the cube
+    def last_days_start(self, days):
+        if not self.dates:
+            return None
+        return (date.fromisoformat(self.dates[-1]) - timedelta(days=days - 1)).isoformat()
+
+    # The window's sums per driver ID, for the keys seen in it, as aggregate_roaming_data.py's partials
+    def window_frame(self, start=None, end=None):
+        sums = self.window_sums(start, end)
+        seen = sums[:, DAYS_SEEN] > 0
+        frame = pd.DataFrame({ID_COLUMN: self.keys[seen]})
+        for i, col in enumerate(aggregate.sum_columns):
+            frame[col] = sums[seen, i]
+        return frame
+
+    # aggregated_roaming_data.csv's rows for [start, end]; None when the window holds no History
+    def aggregated(self, start=None, end=None):
+        frame = self.window_frame(start, end)
+        if frame.empty:
+            return None
+        return aggregate.aggregate_partials([frame])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the History date x driver cube and aggregate any date window from it.")
+    parser.add_argument("--from", dest="start", default=None, help="First day of the window (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", default=None, help="Last day of the window (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=None, help="The last N days of History (instead of --from)")
+    parser.add_argument("--output", default=None,
+                        help="CSV to write (default: Output/aggregated_roaming_data.csv for all of History, "
+                             "Output/aggregated_roaming_data_<from>_<to>.csv for a window)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the cube and the aggregation cache from every History file")
+    parser.add_argument("--build-only", action="store_true", help="Only build the cube")
+    args = parser.parse_args()
+
+    with stage("cube build") as build_stage:
+        cube = RoamingCube.build(rebuild=args.rebuild)
+        build_stage["rows_out"] = len(cube.keys)
+    if args.build_only:
+        return
+
+    start = cube.last_days_start(args.days) if args.days else args.start
+    with stage("window query") as query_stage:
+        query_start = time.perf_counter()
+        aggregated_df = cube.aggregated(start, args.end)
+        query_seconds = time.perf_counter() - query_start
+        query_stage["rows_out"] = 0 if aggregated_df is None else len(aggregated_df)
+
+    if aggregated_df is None:
+        print(f"No History data between {start or 'the first day'} and {args.end or 'the last day'}.")
+        return
+
+    output_file = args.output
+    if output_file is None:
+        if start is None and args.end is None:
+            output_file = aggregate.output_file
+        else:
+            first, last = cube.bounds(start, args.end)
+            output_file = os.path.join(aggregate.output_path,
+                                       f"aggregated_roaming_data_{cube.dates[first]}_{cube.dates[last - 1]}.csv")
+
+    aggregated_df.to_csv(output_file, index=False)
+    print(f"✅ {len(aggregated_df)} Adapter-Driver(s) aggregated in {query_seconds * 1000:.1f} ms, saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from driver_ids import adapter_driver_key
+
+# ijson lets us decode the response body incrementally; fall back to json.loads when it isn't installed
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# What a malformed body raises while being decoded
+DECODE_ERRORS = (ValueError, TypeError, AttributeError, OverflowError) + ((ijson.JSONError,) if ijson is not None else ())
+
+SUM_FIELDS = ['goodSum', 'criticalSum', 'warningSum']
+
+# Set ROAMING_STREAM_DECODE=1 to decode response bodies incrementally (lower peak memory, slower)
+STREAM_DECODE = os.environ.get("ROAMING_STREAM_DECODE") == "1"
+
+
+# A response body that isn't the JSON shape we expect; the fetchers count it as that customer's failure
+class PayloadError(ValueError):
+    pass
+
+
+# Below this many rows plain string columns are built: building categoricals costs a few milliseconds per call
+# whatever the size, which only pays off (in time and memory) for large tenants. Measured with
+# benchmark_decoding.py, the two break even at around 10,000 rows.
+CATEGORICAL_MIN_ROWS = 10000
+
+
+# Assemble the decoded column arrays into the frame the fetch scripts expect, with int64 counts. Large payloads get
+# adapter, driver and account as categoricals (each distinct string stored once) and Adapter-Driver built once
+# per distinct pair; small ones plain strings. Either way a missing adapter or driver gives a missing Adapter-Driver.
+def _build_frame(columns, account_name):
+    adapters, drivers, good, critical, warning, clients = columns
+    if not adapters:
+        return None
+
+    frame = {}
+    if len(adapters) < CATEGORICAL_MIN_ROWS:
+        if account_name is not None:
+            frame["Account Name"] = [account_name] * len(adapters)
+        frame["Adapter"] = adapters
+        frame["Driver"] = drivers
+        frame["Adapter-Driver"] = [None if adapter is None or driver is None else f"{adapter} - {driver}"
+                                   for adapter, driver in zip(adapters, drivers)]
+    else:
+        adapter = pd.Series(adapters, dtype=object).astype('category')
+        driver = pd.Series(drivers, dtype=object).astype('category')
+        if account_name is not None:
+            frame["Account Name"] = pd.Categorical.from_codes(np.zeros(len(adapters), dtype=np.int8), categories=[account_name])
+        frame["Adapter"] = adapter
+        frame["Driver"] = driver
+        frame["Adapter-Driver"] = adapter_driver_key(adapter, driver)  # Concatenated Adapter-Driver column
+    frame["goodSum"] = np.asarray(good, dtype=np.int64)
+    frame["criticalSum"] = np.asarray(critical, dtype=np.int64)
+    frame["warningSum"] = np.asarray(warning, dtype=np.int64)
+    frame["clientCount"] = np.asarray(clients, dtype=np.int64)
+    return pd.DataFrame(frame)
+
+
+# Decode an already-parsed 'results' list straight into column arrays (one row per entry/type pair)
+def decode_results(roaming_data, account_name=None):
+    adapters, drivers, good, critical, warning, clients = [], [], [], [], [], []
+
+    for entry in roaming_data:
+        types = entry.get("types") or ()
+        n = len(types)
+        if not n:
+            continue
+
+        adapters.extend([entry.get('driverProvider', 'Unknown')] * n)
+        drivers.extend([entry.get('driverVersion', 'Unknown')] * n)
+        clients.extend([entry.get("clientCount") or 0] * n)
+        for type_info in types:
+            good.append(type_info.get("goodSum") or 0)
+            critical.append(type_info.get("criticalSum") or 0)
+            warning.append(type_info.get("warningSum") or 0)
+
+    return _build_frame((adapters, drivers, good, critical, warning, clients), account_name)
+
+
+# Decode a raw response body event by event, never materializing the entries as dicts
+def _stream_columns(body):
+    adapters, drivers, good, critical, warning, clients = [], [], [], [], [], []
+    entry_start = 0
+    entry = {}
+    sums = None
+
+    for prefix, event, value in ijson.parse(body):
+        if prefix == 'results.item':
+            if event == 'start_map':
+                entry_start = len(good)
+                entry = {}
+            elif event == 'end_map':
+                # Entry-level fields may come before or after 'types'; fill them in for all of its rows
+                n = len(good) - entry_start
+                adapters.extend([entry.get('driverProvider', 'Unknown')] * n)
+                drivers.extend([entry.get('driverVersion', 'Unknown')] * n)
+                clients.extend([entry.get('clientCount', 0)] * n)
+        elif prefix == 'results.item.types.item':
+            if event == 'start_map':
+                sums = [0, 0, 0]
+            elif event == 'end_map':
+                good.append(sums[0])
+                critical.append(sums[1])
+                warning.append(sums[2])
+        elif prefix.startswith('results.item.types.item.'):
+            field = prefix[len('results.item.types.item.'):]
+            if field in SUM_FIELDS and value is not None:
+                sums[SUM_FIELDS.index(field)] = int(value)
+        elif prefix in ('results.item.driverProvider', 'results.item.driverVersion'):
+            entry[prefix[len('results.item.'):]] = value
+        elif prefix == 'results.item.clientCount':
+            entry['clientCount'] = int(value or 0)
+
+    return adapters, drivers, good, critical, warning, clients
+
+
+# Decode a raw adapter-drivers response body; returns None when there are no rows ("results": null included)
+# and raises PayloadError when the body can't be decoded
+def decode_payload(body, account_name=None, stream=STREAM_DECODE):
+    try:
+        if stream and ijson is not None:
+            return _build_frame(_stream_columns(body), account_name)
+        return decode_results(json.loads(body).get('results') or [], account_name)
+    except DECODE_ERRORS as e:
+        raise PayloadError(f"Undecodable roaming payload: {e}") from e
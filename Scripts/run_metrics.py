@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+# resource gives peak RSS on Linux/macOS; it doesn't exist on Windows, where RSS is simply not reported
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Every script run writes one JSON file here: its stages (wall/CPU time, peak RSS, rows in/out) and,
+# for the fetchers, one entry per customer (auth/fetch latency, payload bytes, failure reason) and the p50/p95/p99
+# of every HTTP request they made
+METRICS_DIR = os.environ.get("ROAMING_METRICS_DIR", "metrics")
+
+# Set ROAMING_PROFILE=cprofile (a .prof file per stage) or tracemalloc (top allocation sites per stage)
+PROFILE = os.environ.get("ROAMING_PROFILE", "").lower()
+
+_lock = threading.Lock()
+_run = None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _script_name():
+    return os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+
+
+# Start recording this process's run (called implicitly by stage() and record_customer()); the file is written at exit
+def start_run(script=None):
+    global _run
+    with _lock:
+        if _run is None:
+            _run = {
+                "script": script or _script_name(),
+                "started": datetime.now().isoformat(timespec="seconds"),
+                "pid": os.getpid(),
+                "profile": PROFILE or None,
+                "stages": [],
+                "customers": [],
+                "_request_seconds": [],
+                "_wall_start": time.perf_counter(),
+                "_cpu_start": time.process_time(),
+            }
+            atexit.register(write_metrics)
+    return _run
+
+
+@contextmanager
+def _profiled(record):
+    if PROFILE == "cprofile":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            path = os.path.join(METRICS_DIR, f"{_run['script']}_{record['stage']}_{os.getpid()}.prof")
+            profiler.dump_stats(path)
+            record["profile_file"] = path
+    elif PROFILE == "tracemalloc":
+        import tracemalloc
+
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            record["traced_peak_mb"] = round(peak / 1024 / 1024, 1)
+            record["top_allocations"] = [
+                {"where": str(stat.traceback), "size_mb": round(stat.size / 1024 / 1024, 2)}
+                for stat in snapshot.statistics("lineno")[:10]
+            ]
+    else:
+        yield
+
+
+# Time a block of work; set record["rows_out"] (and anything else worth keeping) inside the block
+@contextmanager
+def stage(name, rows_in=None):
+    run = start_run()
+    record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        with _profiled(record):
+            yield record
+        record["status"] = "ok"
+    except BaseException as e:
+        record["status"] = f"failed: {type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        record["wall_seconds"] = round(time.perf_counter() - wall_start, 3)
+        record["cpu_seconds"] = round(time.process_time() - cpu_start, 3)
+        record["peak_rss_mb"] = _peak_rss_mb()
+        with _lock:
+            run["stages"].append(record)
+
+
+# One customer's fetch: customer, auth_seconds, fetch_seconds, payload_bytes, rows, error (None when it succeeded)
+def record_customer(customer, **fields):
+    run = start_run()
+    entry = {"customer": str(customer), **fields}
+    with _lock:
+        run["customers"].append(entry)
+
+
+# One HTTP request attempt as the client saw it: seconds from sending it to having the whole response (or the error)
+def record_request(seconds):
+    run = start_run()
+    with _lock:
+        run["_request_seconds"].append(seconds)
+
+
+# Client-side seconds of every request recorded so far in this run, in the order they finished
+def request_seconds():
+    with _lock:
+        return list(_run["_request_seconds"]) if _run else []
+
+
+# p50/p95/p99/max in milliseconds (nearest rank, like mock_7signal_api.py's /_stats)
+def latency_percentiles(seconds):
+    latencies = sorted(seconds)
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000, 3) if latencies else None
+
+    return {"p50": percentile(50), "p95": percentile(95), "p99": percentile(99), "max": percentile(100)}
+
+
+# (customer, error) for every customer of this run whose fetch failed
+def lost_customers():
+    with _lock:
+        customers = list(_run["customers"]) if _run else []
+    return [(entry["customer"], entry["error"]) for entry in customers if entry.get("error")]
+
+
+# Short, stable description of why a request failed
+def failure_reason(error):
+    status = getattr(getattr(error, "response", None), "status_code", None) or getattr(error, "status", None)
+    if status:
+        return f"HTTP {status}"
+    return f"{type(error).__name__}: {error}"[:200] if str(error) else type(error).__name__
+
+
+def write_metrics():
+    global _run
+    with _lock:
+        run, _run = _run, None
+    if run is None:
+        return None
+
+    run["wall_seconds"] = round(time.perf_counter() - run.pop("_wall_start"), 3)
+    run["cpu_seconds"] = round(time.process_time() - run.pop("_cpu_start"), 3)
+    run["peak_rss_mb"] = _peak_rss_mb()
+    failed = [entry for entry in run["customers"] if entry.get("error")]
+    run["customer_summary"] = {"total": len(run["customers"]), "failed": len(failed)}
+    request_times = run.pop("_request_seconds")
+    run["request_summary"] = {"total": len(request_times), "latency_ms": latency_percentiles(request_times)}
+
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{run['script']}_{datetime.now().strftime('%Y%m%dT%H%M%S')}_{run['pid']}.json")
+        with open(path, "w") as f:
+            json.dump(run, f, indent=2, default=str)
+    except OSError as e:
+        print(f"⚠️ Could not write metrics: {e}")
+        return None
+    return path
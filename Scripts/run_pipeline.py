@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import pandas as pd
+import aggregate_all
+import aggregate_roaming_data as aggregate
+import merge_with_vintage as merge
+import calculate_manufacturers_and_samples as manufacturers
+import aggregate_critical_roaming_minutes as critical
+import history_store
+import driver_ids
+import normalization
+import dashboard_export
+from aggregate_all import as_read_back
+from history_store import history_sources
+from run_metrics import stage
+
+# Runs the local dashboard stages (aggregate, critical minutes, manufacturers/samples from one History scan -> merge)
+# in one process, handing DataFrames from stage to stage in memory instead of re-reading each CSV.
+# Every stage's inputs are hashed; a stage whose inputs and outputs are unchanged since the last run is skipped.
+state_file = os.path.join(".cache", "pipeline_state.json")
+
+
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# One hash over a set of files: their paths and contents
+def hash_files(paths):
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        digest.update(path.replace(os.sep, '/').encode())
+        digest.update(_file_sha1(path).encode() if os.path.exists(path) else b'missing')
+    return digest.hexdigest()
+
+
+# A stage's code counts as one of its inputs, so editing a script reruns its stage
+def hash_code(*modules):
+    return hash_files([module.__file__ for module in modules])
+
+
+def stage_key(*parts):
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+class Pipeline:
+    def __init__(self, state_path=state_file, force=False):
+        self.state_path = state_path
+        self.force = force
+        self.frames = {}
+        try:
+            with open(state_path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # Skipped only when the inputs match the last run and every output is still exactly what that run wrote
+    def _up_to_date(self, name, key):
+        previous = self.state.get(name)
+        if self.force or not previous or previous['key'] != key:
+            return False
+        return all(os.path.exists(path) and _file_sha1(path) == sha1 for path, sha1 in previous['outputs'].items())
+
+    # Hash of what a stage wrote; downstream stages use it as their input key
+    def output_key(self, name):
+        return stage_key(*(f"{path}={sha1}" for path, sha1 in sorted(self.state[name]['outputs'].items())))
+
+    def run_stage(self, name, key, outputs, run):
+        if self._up_to_date(name, key):
+            print(f"⏭️ {name}: inputs unchanged, skipped")
+            return False
+
+        start = time.perf_counter()
+        with stage(name) as stage_record:
+            finished = run()
+            stage_record["skipped"] = finished is False
+        if finished is False:
+            self.state.pop(name, None)
+            self._save()
+            return False
+        self.state[name] = {'key': key, 'outputs': {path: _file_sha1(path) for path in outputs}}
+        self._save()
+        print(f"✅ {name} finished in {time.perf_counter() - start:.1f}s")
+        return True
+
+    # The frame a stage produced in this run, or its saved CSV when that stage was skipped
+    def frame(self, name, path):
+        if name not in self.frames:
+            self.frames[name] = pd.read_csv(path)
+        return self.frames[name]
+
+
+def run_pipeline(folder_path=aggregate.folder_path, force=False, rebuild=False):
+    pipeline = Pipeline(force=force)
+    history_key = hash_files(history_sources(folder_path))
+
+    # === AGGREGATE, CRITICAL ROAMING MINUTES, MANUFACTURERS AND TOTAL SAMPLES (one History scan) ===
+    def run_aggregate():
+        results = aggregate_all.aggregate_all(folder_path, rebuild=rebuild)
+        if results is None:
+            return False
+        aggregate_all.write_all(results)
+        pipeline.frames['aggregate'] = as_read_back(results['aggregated'])
+
+    aggregate_outputs = [aggregate.output_file, critical.output_file,
+                         manufacturers.manufacturers_output_file, manufacturers.total_samples_output_file]
+    # The normalization rules file counts as code: editing it reruns the aggregate stage
+    aggregate_key = stage_key(hash_code(aggregate_all, aggregate, critical, manufacturers, history_store, driver_ids, normalization),
+                              hash_files([normalization.RULES_FILE]), history_key)
+    if not pipeline.run_stage('aggregate', aggregate_key, aggregate_outputs, run_aggregate) \
+            and 'aggregate' not in pipeline.state:
+        return
+
+    # === MERGE WITH VINTAGE ===
+    def run_merge():
+        vintage_df = pd.read_csv(merge.file2_path)
+        merged_df = merge.merge_vintage(pipeline.frame('aggregate', aggregate.output_file), vintage_df)
+        merge.write_merged(merged_df)
+
+    merge_key = stage_key(hash_code(merge, dashboard_export), pipeline.output_key('aggregate'), hash_files([merge.file2_path]))
+    pipeline.run_stage('merge', merge_key,
+                       [merge.output_csv_path] + merge.output_dashboard_paths, run_merge)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the dashboard build stages in one process, skipping stages whose inputs are unchanged.")
+    parser.add_argument("--force", action="store_true", help="Run every stage even if its inputs are unchanged")
+    parser.add_argument("--rebuild", action="store_true", help="Also discard the aggregation cache and re-read every History file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    run_pipeline(force=args.force or args.rebuild, rebuild=args.rebuild)
+    print(f"🏁 Pipeline finished in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Runs the roaming scripts as a dependency graph: each stage declares the files it reads and writes,
+# a stage starts (in its own process) as soon as every stage producing its inputs has finished,
+# and independent stages run side by side. Paths are relative to the repo root; a directory covers everything in it.
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+Stage = namedtuple("Stage", ["name", "script", "inputs", "outputs", "default"])
+
+STAGES = [
+    Stage("fetch", "fetch_roaming_data.py",
+          inputs=["Customer_Data.xlsx"],
+          outputs=["History", "Output/bad_drivers_per_acct"], default=True),
+    Stage("intel", "get_latest_intel_driver.py",
+          inputs=[],
+          outputs=["Output/intel_driver_info.csv"], default=True),
+    # Aggregates, critical minutes, manufacturers and total samples from one History scan
+    Stage("aggregate", "aggregate_all.py",
+          inputs=["History"],
+          outputs=["Output/aggregated_roaming_data.csv", "Output/aggregated_critical_roaming_minutes.json",
+                   "Output/manufacturers.csv", "Output/total_samples.csv"], default=True),
+    Stage("vintage", "get_driver_vintage.py",
+          inputs=["Output/aggregated_roaming_data.csv", "Output/driver_vintage_cache.csv"],
+          outputs=["Output/aggregated_roaming_data_with_vintage.csv", "Output/driver_vintage_cache.csv"], default=False),
+    Stage("merge", "merge_with_vintage.py",
+          inputs=["Output/aggregated_roaming_data.csv", "Output/aggregated_roaming_data_with_vintage.csv"],
+          outputs=["Output/merged_roaming_analysis_with_vintage.csv", "Output/data.json", "Output/data.columns.json",
+                   "Output/merged_roaming_analysis_with_vintage.json", "Output/dashboard_manifest.json"], default=True),
+    Stage("reports", "find_good_drivers_per_acct.py",
+          inputs=["Output/bad_drivers_per_acct", "Output/merged_roaming_analysis_with_vintage.csv"],
+          outputs=["Output/roaming_impact_reports_per_acct"], default=False),
+]
+
+
+def _overlaps(a, b):
+    return a == b or a.startswith(b + "/") or b.startswith(a + "/")
+
+
+# {stage name: set of stage names it waits for}, limited to the selected stages
+def build_graph(stages):
+    graph = {}
+    for stage in stages:
+        graph[stage.name] = {
+            producer.name for producer in stages
+            if producer.name != stage.name and any(_overlaps(i, o) for i in stage.inputs for o in producer.outputs)
+        }
+
+    # Refuse cycles up front rather than waiting forever
+    remaining = {name: set(deps) for name, deps in graph.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Stage dependencies form a cycle: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return graph
+
+
+# Longest chain of finished stages by duration: the floor on wall-clock time however many workers there are
+def critical_path(graph, durations):
+    finish = {}
+    previous = {}
+
+    def chain_time(name):
+        if name not in finish:
+            deps = [dep for dep in graph[name] if dep in durations]
+            slowest = max(deps, key=chain_time, default=None)
+            previous[name] = slowest
+            finish[name] = durations[name] + (chain_time(slowest) if slowest else 0.0)
+        return finish[name]
+
+    end = max(durations, key=chain_time, default=None)
+    path = []
+    while end is not None:
+        path.append(end)
+        end = previous[end]
+    return list(reversed(path)), (finish[path[0]] if path else 0.0)
+
+
+# Run one stage's script in its own Python process; output is captured so concurrent stages don't interleave
+def run_script(stage):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, stage.script)],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return result.returncode, result.stdout, time.perf_counter() - start
+
+
+def run_stages(stages, jobs=None):
+    graph = build_graph(stages)
+    by_name = {stage.name: stage for stage in stages}
+    pending = dict(graph)
+    durations = {}
+    failed = set()
+    skipped = set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs or len(stages)) as executor:
+        while pending or running:
+            # Stages whose producer failed can't run; everything else waits until its producers are done
+            for name, deps in list(pending.items()):
+                if deps & (failed | skipped):
+                    skipped.add(name)
+                    del pending[name]
+                    print(f"⏭️ {name}: skipped, depends on {', '.join(sorted(deps & (failed | skipped)))}")
+                elif deps <= durations.keys():
+                    del pending[name]
+                    print(f"▶️ {name}: started")
+                    running[executor.submit(run_script, by_name[name])] = name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                returncode, output, elapsed = future.result()
+                print(f"\n===== {name} ({by_name[name].script}) =====")
+                print(output.rstrip())
+                if returncode == 0:
+                    durations[name] = elapsed
+                    print(f"✅ {name} finished in {elapsed:.1f}s\n")
+                else:
+                    failed.add(name)
+                    print(f"❌ {name} failed (exit code {returncode}) after {elapsed:.1f}s\n")
+
+    return graph, durations, failed, skipped
+
+
+def main():
+    names = [stage.name for stage in STAGES]
+    parser = argparse.ArgumentParser(description="Run the roaming scripts concurrently wherever their inputs and outputs allow.")
+    parser.add_argument("--only", nargs="+", choices=names, help="Run just these stages")
+    parser.add_argument("--with", dest="extra", nargs="+", choices=names, default=[],
+                        help="Add stages that are off by default (vintage, reports)")
+    parser.add_argument("--skip", nargs="+", choices=names, default=[], help="Leave these stages out")
+    parser.add_argument("--jobs", type=int, default=None, help="Maximum stages running at once (default: no limit)")
+    parser.add_argument("--dry-run", action="store_true", help="Print each stage and what it waits for, then stop")
+    args = parser.parse_args()
+
+    selected = set(args.only) if args.only else {stage.name for stage in STAGES if stage.default} | set(args.extra)
+    stages = [stage for stage in STAGES if stage.name in selected and stage.name not in args.skip]
+
+    if args.dry_run:
+        for name, deps in build_graph(stages).items():
+            print(f"{name}: waits for {', '.join(sorted(deps)) or 'nothing'}")
+        return
+
+    start = time.perf_counter()
+    graph, durations, failed, skipped = run_stages(stages, args.jobs)
+    wall_time = time.perf_counter() - start
+
+    path, path_time = critical_path(graph, durations)
+    print(f"🏁 Wall-clock time: {wall_time:.1f}s (stages add up to {sum(durations.values()):.1f}s)")
+    print(f"🧭 Critical path: {' -> '.join(f'{name} ({durations[name]:.1f}s)' for name in path)} = {path_time:.1f}s")
+
+    if failed or skipped:
+        print(f"❌ Failed: {', '.join(sorted(failed)) or 'none'}; skipped: {', '.join(sorted(skipped)) or 'none'}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
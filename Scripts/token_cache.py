@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import requests
+from fetch_scheduler import request_with_retry
+
+# fcntl lets concurrent fetch processes take turns updating the cache file; without it (Windows) updates still merge
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Tokens are kept on disk between runs, keyed by client_id (never commit this file)
+TOKEN_CACHE_FILE = os.environ.get("ROAMING_TOKEN_CACHE", os.path.join(".cache", "oauth_tokens.json"))
+
+# Treat tokens as expired slightly early so they don't lapse mid-run
+EXPIRY_MARGIN_SECONDS = 120
+
+# Lifetime assumed when the token response has no expires_in
+DEFAULT_EXPIRES_IN = 3600
+
+AUTH_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/x-www-form-urlencoded"
+}
+
+_lock = threading.Lock()
+_tokens = None
+
+
+def _read_tokens():
+    try:
+        with open(TOKEN_CACHE_FILE) as f:
+            tokens = json.load(f)
+        return tokens if isinstance(tokens, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _load_tokens():
+    global _tokens
+    if _tokens is None:
+        _tokens = _read_tokens()
+    return _tokens
+
+
+# Other fetch processes may share the cache file, so only this process's own change is applied to what is on disk
+# right before writing (the later-expiring token wins), never a whole in-memory copy that would drop their tokens.
+# stored is a client_id just given a token; dropped a (client_id, token) pair the API rejected.
+def _save_tokens(stored=None, dropped=None):
+    directory = os.path.dirname(TOKEN_CACHE_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(f"{TOKEN_CACHE_FILE}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        tokens = _read_tokens()
+        if stored is not None:
+            current = tokens.get(stored)
+            if current is None or current.get("expires_at", 0) < _tokens[stored]["expires_at"]:
+                tokens[stored] = _tokens[stored]
+        if dropped is not None and tokens.get(dropped[0], {}).get("access_token") == dropped[1]:
+            del tokens[dropped[0]]
+
+        # Write to a private (0600), uniquely named temp file and swap it in so a crash never leaves a torn cache
+        fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=".oauth_tokens.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(tokens, f)
+            os.replace(tmp_path, TOKEN_CACHE_FILE)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    # Pick up what the other processes cached in the meantime
+    _tokens.update(tokens)
+    if dropped is not None and dropped[0] not in tokens:
+        _tokens.pop(dropped[0], None)
+
+
+# Return a still-valid cached token for client_id, or None
+def get_cached_token(client_id):
+    with _lock:
+        entry = _load_tokens().get(str(client_id))
+    if entry and entry.get("expires_at", 0) - EXPIRY_MARGIN_SECONDS > time.time():
+        return entry["access_token"]
+    return None
+
+
+# Remember a token until the expiry reported by the API
+def store_token(client_id, access_token, expires_in=None):
+    try:
+        expires_in = int(expires_in)
+    except (TypeError, ValueError):
+        expires_in = DEFAULT_EXPIRES_IN
+
+    with _lock:
+        _load_tokens()[str(client_id)] = {
+            "access_token": access_token,
+            "expires_at": time.time() + expires_in
+        }
+        try:
+            _save_tokens(stored=str(client_id))
+        except OSError as e:
+            print(f"⚠️ Could not write token cache {TOKEN_CACHE_FILE}: {e}")
+
+
+# Drop a token the API rejected so the next call fetches a fresh one
+def invalidate_token(client_id):
+    with _lock:
+        entry = _load_tokens().pop(str(client_id), None)
+        if entry is not None:
+            try:
+                _save_tokens(dropped=(str(client_id), entry.get("access_token")))
+            except OSError:
+                pass
+
+
+# Function to fetch authentication token, reusing a cached one while it is valid
+def get_auth_token(auth_url, client_id, client_secret, timeout=10):
+    token = get_cached_token(client_id)
+    if token:
+        return token
+
+    auth_data = {
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "grant_type": "client_credentials"
+    }
+    try:
+        response = request_with_retry("POST", auth_url, data=auth_data, headers=AUTH_HEADERS, timeout=timeout)
+        response.raise_for_status()
+        payload = response.json()
+    except requests.RequestException:
+        return None
+
+    token = payload.get("access_token")
+    if token:
+        store_token(client_id, token, payload.get("expires_in"))
+    return token
+
+
+# Forget every cached token, in memory and on disk (e.g. to start a load test from cold)
+def clear_tokens():
+    global _tokens
+    with _lock:
+        _tokens = {}
+        try:
+            os.remove(TOKEN_CACHE_FILE)
+        except FileNotFoundError:
+            pass